@@ -23,14 +23,22 @@ setup(
     install_requires=[
         "pandas>=1.0.0",
         "numpy>=1.18.0",
-        "matplotlib>=3.0.0",
+        "matplotlib>=3.3.0",
         "xarray>=0.16.0",
         "scipy>=1.4.0",
-        "haversine>=2.4.0",
         "geopy>=2.0.0",
         "argparse>=1.4.0",
         # Add other dependencies as needed
     ],
+    extras_require={
+        "fast": [
+            "pyarrow>=10",
+            "dask>=2021.1.0",
+            "numba>=0.56",
+            "orjson>=3",
+            "pyproj>=3",
+        ],
+    },
     include_package_data=True,
     package_data={
         "hydra": ["data/*.csv", "data/*.nc"],  # Adjust based on your data files
@@ -1,18 +1,42 @@
 # src/hydra/__init__.py
 
+import importlib
+
 from .cli import main_function
 from .config import compute_lat_lon_bounds, config
-from .data_loading import (combine_data, extract_ctd_coordinates,
-                           load_all_data, load_csv_files, load_netcdf_files_with_zoom)
+from .data_loading import (extract_ctd_coordinates, load_all_data,
+                           load_csv_files, load_netcdf_file, load_netcdf_files,
+                           load_netcdf_files_with_zoom, load_parquet_files,
+                           maybe_convert_csvs_to_parquet)
 from .data_processing import combine_data, filter_data_by_temperature
-from .plotting import generalized_map_plot, generalized_profile_plot
-from .utilities import (calculate_cumulative_distances,  # Aggiunta qui
-                        validate_coordinates)
+from .utilities import (CoordinatePath, bottle_lookup_indices,
+                        calculate_cumulative_distances,  # Aggiunta qui
+                        pairwise_haversine, validate_coordinates)
+
+# Plotting pulls in matplotlib, so it is only imported on first access
+_LAZY_ATTRIBUTES = {
+    "generalized_map_plot": ".plotting",
+    "generalized_profile_plot": ".plotting",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        module = importlib.import_module(_LAZY_ATTRIBUTES[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     "config",
     "compute_lat_lon_bounds",
     "load_csv_files",
+    "load_parquet_files",
+    "maybe_convert_csvs_to_parquet",
+    "load_netcdf_file",
+    "load_netcdf_files",
     "load_netcdf_files_with_zoom",
     "extract_ctd_coordinates",
     "combine_data",
@@ -20,6 +44,9 @@ __all__ = [
     "filter_data_by_temperature",
     "validate_coordinates",
     "calculate_cumulative_distances",
+    "pairwise_haversine",
+    "CoordinatePath",
+    "bottle_lookup_indices",
     "generalized_map_plot",
     "generalized_profile_plot",
     "main_function",  # Aggiunta qui
@@ -0,0 +1,175 @@
+# src/hydra/_kernels.py
+
+"""
+Compiled distance kernels used by hydra.utilities.
+
+hydra.utilities imports this module lazily, only when a distance calculation
+needs it, so importing hydra does not load Numba.
+
+Numba is an optional dependency. When it is not installed, HAS_NUMBA is False,
+the kernels stay plain Python functions, and callers use their non-compiled
+code paths instead.
+"""
+
+import math
+
+import numpy as np
+
+from hydra.utilities import WGS84_A, WGS84_F
+
+try:
+    from numba import njit, prange
+except ImportError:  # pragma: no cover - optional dependency
+    HAS_NUMBA = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        """
+        Stand-in for numba.njit that returns the function unchanged.
+        """
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+else:
+    HAS_NUMBA = True
+
+# WGS84 semi-minor axis (meters)
+WGS84_B = (1 - WGS84_F) * WGS84_A
+
+VINCENTY_MAX_ITERATIONS = 200
+VINCENTY_TOLERANCE = 1e-12
+
+
+@njit(cache=True)
+def _vincenty_distance(lat1, lon1, lat2, lon2):
+    """
+    Vincenty inverse distance on the WGS84 ellipsoid.
+
+    :param lat1, lon1, lat2, lon2: Coordinates in radians.
+    :return: Distance in kilometers, or NaN if the iteration does not converge
+             (nearly antipodal points).
+    """
+    u1 = math.atan((1 - WGS84_F) * math.tan(lat1))
+    u2 = math.atan((1 - WGS84_F) * math.tan(lat2))
+    sin_u1, cos_u1 = math.sin(u1), math.cos(u1)
+    sin_u2, cos_u2 = math.sin(u2), math.cos(u2)
+    lon_diff = lon2 - lon1
+
+    lam = lon_diff
+    sin_sigma = cos_sigma = sigma = cos_sq_alpha = cos_2sigma_m = 0.0
+    converged = False
+    for _ in range(VINCENTY_MAX_ITERATIONS):
+        sin_lam, cos_lam = math.sin(lam), math.cos(lam)
+        sin_sigma = math.sqrt(
+            (cos_u2 * sin_lam) ** 2
+            + (cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lam) ** 2
+        )
+        if sin_sigma == 0.0:
+            return 0.0  # Coincident points
+        cos_sigma = sin_u1 * sin_u2 + cos_u1 * cos_u2 * cos_lam
+        sigma = math.atan2(sin_sigma, cos_sigma)
+        sin_alpha = cos_u1 * cos_u2 * sin_lam / sin_sigma
+        cos_sq_alpha = 1 - sin_alpha**2
+        if cos_sq_alpha != 0.0:
+            cos_2sigma_m = cos_sigma - 2 * sin_u1 * sin_u2 / cos_sq_alpha
+        else:
+            cos_2sigma_m = 0.0  # Both points on the equator
+        c = WGS84_F / 16 * cos_sq_alpha * (4 + WGS84_F * (4 - 3 * cos_sq_alpha))
+        lam_prev = lam
+        lam = lon_diff + (1 - c) * WGS84_F * sin_alpha * (
+            sigma
+            + c
+            * sin_sigma
+            * (cos_2sigma_m + c * cos_sigma * (-1 + 2 * cos_2sigma_m**2))
+        )
+        if abs(lam - lam_prev) < VINCENTY_TOLERANCE:
+            converged = True
+            break
+
+    if not converged:
+        return np.nan
+
+    u_sq = cos_sq_alpha * (WGS84_A**2 - WGS84_B**2) / WGS84_B**2
+    a = 1 + u_sq / 16384 * (4096 + u_sq * (-768 + u_sq * (320 - 175 * u_sq)))
+    b = u_sq / 1024 * (256 + u_sq * (-128 + u_sq * (74 - 47 * u_sq)))
+    delta_sigma = (
+        b
+        * sin_sigma
+        * (
+            cos_2sigma_m
+            + b
+            / 4
+            * (
+                cos_sigma * (-1 + 2 * cos_2sigma_m**2)
+                - b
+                / 6
+                * cos_2sigma_m
+                * (-3 + 4 * sin_sigma**2)
+                * (-3 + 4 * cos_2sigma_m**2)
+            )
+        )
+    )
+    return WGS84_B * a * (sigma - delta_sigma) / 1000.0
+
+
+@njit(cache=True)
+def vincenty_segments(lat, lon):
+    """
+    Vincenty distances between consecutive points.
+
+    :param lat: Contiguous float64 array of latitudes in radians.
+    :param lon: Contiguous float64 array of longitudes in radians.
+    :return: Array of N - 1 segment distances in kilometers (NaN where not converged).
+    """
+    n = lat.shape[0]
+    out = np.empty(max(n - 1, 0))
+    for i in range(1, n):
+        out[i - 1] = _vincenty_distance(lat[i - 1], lon[i - 1], lat[i], lon[i])
+    return out
+
+
+@njit(cache=True, fastmath=True)
+def cumulative_haversine(lat, lon, radius):
+    """
+    Running haversine distance along a track, accumulated in one pass.
+
+    :param lat: Contiguous float64 array of latitudes in radians.
+    :param lon: Contiguous float64 array of longitudes in radians.
+    :param radius: Sphere radius in kilometers.
+    :return: Array of N cumulative distances in kilometers, starting with 0.
+    """
+    n = lat.shape[0]
+    out = np.empty(max(n, 1))
+    out[0] = 0.0
+    total = 0.0
+    for i in range(1, n):
+        sin_dlat = math.sin((lat[i] - lat[i - 1]) * 0.5)
+        sin_dlon = math.sin((lon[i] - lon[i - 1]) * 0.5)
+        a = sin_dlat * sin_dlat + math.cos(lat[i - 1]) * math.cos(lat[i]) * sin_dlon * sin_dlon
+        total += 2.0 * radius * math.asin(math.sqrt(a))
+        out[i] = total
+    return out
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def haversine_segments_parallel(lat, lon, radius):
+    """
+    Haversine distances between consecutive points, computed across threads.
+
+    Each segment is independent, so the loop is split over the available cores;
+    the running sum is left to the caller.
+
+    :param lat: Contiguous float64 array of latitudes in radians.
+    :param lon: Contiguous float64 array of longitudes in radians.
+    :param radius: Sphere radius in kilometers.
+    :return: Array of N - 1 segment distances in kilometers.
+    """
+    n = lat.shape[0]
+    out = np.empty(max(n - 1, 0))
+    for i in prange(1, n):
+        sin_dlat = math.sin((lat[i] - lat[i - 1]) * 0.5)
+        sin_dlon = math.sin((lon[i] - lon[i - 1]) * 0.5)
+        a = sin_dlat * sin_dlat + math.cos(lat[i - 1]) * math.cos(lat[i]) * sin_dlon * sin_dlon
+        out[i - 1] = 2.0 * radius * math.asin(math.sqrt(a))
+    return out
@@ -1,13 +1,11 @@
 # src/hydra/cli.py
 
 import argparse
-import json
 import os
 
 from hydra.data_loading import load_all_data
 from hydra.data_processing import combine_data, filter_data_by_temperature
-from hydra.plotting import generalized_map_plot, generalized_profile_plot
-from hydra.utilities import validate_coordinates
+from hydra.utilities import load_json_file, validate_coordinates
 
 
 def main_function(args=None):
@@ -59,8 +57,7 @@ def main_function(args=None):
 
     # Carica il dizionario dei tipi di bottiglie dal file JSON
     try:
-        with open(parsed_args.bottle_type_dict, "r") as f:
-            bottle_type_dict = json.load(f)
+        bottle_type_dict = load_json_file(parsed_args.bottle_type_dict)
     except Exception as e:
         print(f"Error loading bottle type dictionary: {e}")
         return
@@ -88,8 +85,8 @@ def main_function(args=None):
     # Validate coordinates
     try:
         validate_coordinates(
-            latitudes=combined_bottle["CTD_lat"].tolist(),
-            longitudes=combined_bottle["CTD_lon"].tolist(),
+            latitudes=combined_bottle["CTD_lat"].to_numpy(),
+            longitudes=combined_bottle["CTD_lon"].to_numpy(),
         )
     except Exception as e:
         print(f"Coordinate validation error: {e}")
@@ -109,7 +106,10 @@ def main_function(args=None):
     # Update config with filtered data
     data["filtered_bottle_data"] = filtered_data
 
-    # Generate plots if requested
+    # Generate plots if requested (matplotlib is only imported when needed)
+    if parsed_args.plot or parsed_args.profile_plot:
+        from hydra.plotting import generalized_map_plot, generalized_profile_plot
+
     if parsed_args.plot:
         try:
             generalized_map_plot(
@@ -1,9 +1,9 @@
 # src/hydra/config.py
 
-import os
-
 import pandas as pd
 
+from hydra.utilities import scan_files
+
 # Define static latitude and longitude boundaries as default values
 DEFAULT_MIN_LAT = -90.0  # Minimum latitude (Southern Hemisphere limit)
 DEFAULT_MAX_LAT = 90.0  # Maximum latitude (Northern Hemisphere limit)
@@ -38,26 +38,34 @@ def compute_lat_lon_bounds(bottle_data_dir):
     :param bottle_data_dir: Directory containing bottle data CSV files.
     :return: Tuple of (min_lat, max_lat, min_lon, max_lon)
     """
-    latitudes = []
-    longitudes = []
-    for filename in os.listdir(bottle_data_dir):
-        if filename.endswith(".csv"):
-            file_path = os.path.join(bottle_data_dir, filename)
-            df = pd.read_csv(file_path)
-            # Ensure required columns exist
-            if {"CTD_lat", "CTD_lon"}.issubset(df.columns):
-                latitudes.extend(df["CTD_lat"].dropna().tolist())
-                longitudes.extend(df["CTD_lon"].dropna().tolist())
-            else:
-                raise KeyError(
-                    f"Required columns 'CTD_lat' and 'CTD_lon' not found in {filename}."
-                )
+    min_lat = max_lat = min_lon = max_lon = None
+    coordinate_columns = {"CTD_lat", "CTD_lon"}
+    for entry in scan_files(bottle_data_dir, ".csv"):
+        filename, file_path = entry.name, entry.path
+        # Ensure required columns exist, checking only the header
+        header = pd.read_csv(file_path, nrows=0).columns
+        if not coordinate_columns.issubset(header):
+            raise KeyError(
+                f"Required columns 'CTD_lat' and 'CTD_lon' not found in {filename}."
+            )
+        # Only parse the coordinate columns
+        df = pd.read_csv(file_path, usecols=["CTD_lat", "CTD_lon"])
+
+        # Update running bounds, skipping files without valid coordinates
+        lat_lo, lat_hi = df["CTD_lat"].min(), df["CTD_lat"].max()
+        if not pd.isna(lat_lo):
+            min_lat = lat_lo if min_lat is None else min(min_lat, lat_lo)
+            max_lat = lat_hi if max_lat is None else max(max_lat, lat_hi)
+        lon_lo, lon_hi = df["CTD_lon"].min(), df["CTD_lon"].max()
+        if not pd.isna(lon_lo):
+            min_lon = lon_lo if min_lon is None else min(min_lon, lon_lo)
+            max_lon = lon_hi if max_lon is None else max(max_lon, lon_hi)
 
-    # Determine bounds with fallback to default if no data
-    min_lat = min(latitudes) if latitudes else DEFAULT_MIN_LAT
-    max_lat = max(latitudes) if latitudes else DEFAULT_MAX_LAT
-    min_lon = min(longitudes) if longitudes else DEFAULT_MIN_LON
-    max_lon = max(longitudes) if longitudes else DEFAULT_MAX_LON
+    # Fall back to defaults if no data
+    if min_lat is None:
+        min_lat, max_lat = DEFAULT_MIN_LAT, DEFAULT_MAX_LAT
+    if min_lon is None:
+        min_lon, max_lon = DEFAULT_MIN_LON, DEFAULT_MAX_LON
 
     return min_lat, max_lat, min_lon, max_lon
 
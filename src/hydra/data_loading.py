@@ -1,51 +1,290 @@
 # src/hydra/data_loading.py
 
 import os
+from concurrent.futures import ThreadPoolExecutor
 
+import numpy as np
 import pandas as pd
 import xarray as xr
 
+from hydra.data_processing import combine_data
 from hydra.utilities import (  # Assicurati che sia importata
-    assign_bottle_types_to_stations, calculate_cumulative_distances)
+    assign_bottle_types_to_stations, calculate_cumulative_distances, scan_files)
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pq = None
+
+try:
+    import dask  # noqa: F401
+except ImportError:  # pragma: no cover - optional dependency
+    NETCDF_CHUNKS = None
+else:
+    # Dask-backed chunks keep NetCDF variables lazy until a region is selected
+    NETCDF_CHUNKS = {"lat": 1024, "lon": 1024}
+
+def _strip_suffixes(filename, suffixed_extensions, extension):
+    """
+    Remove the first matching suffix (already joined with the extension) from a
+    filename, or just the extension if none matches.
+    """
+    for suffixed in suffixed_extensions:
+        if filename.endswith(suffixed):
+            return filename[: -len(suffixed)]
+    return filename[: -len(extension)]
+
+
+def _check_required_columns(columns, required_columns, filename):
+    """
+    Raise KeyError if any of the required columns is absent.
+    """
+    if required_columns:
+        missing_cols = [col for col in required_columns if col not in columns]
+        if missing_cols:
+            raise KeyError(f"Missing columns {missing_cols} in file {filename}")
+
+
+def _read_csv(filepath, usecols, chunksize, backend_kwargs, engine="c"):
+    """
+    Read a CSV file, optionally in chunks of `chunksize` rows.
+    """
+    if chunksize is None:
+        return pd.read_csv(
+            filepath, usecols=usecols, engine=engine, **backend_kwargs
+        )
+
+    # The PyArrow engine does not support chunked reads, so chunks always use the C engine
+    with pd.read_csv(
+        filepath, usecols=usecols, chunksize=chunksize, **backend_kwargs
+    ) as reader:
+        parts = list(reader)
+    return pd.concat(parts, ignore_index=True)
+
+
+def _load_csv_file(
+    filepath, suffix_csvs, numeric_columns, required_columns, usecols,
+    chunksize=None, dtype_backend=None, engine="c",
+):
+    """
+    Load a single CSV file and return its cleaned base name with the DataFrame.
+
+    :param suffix_csvs: Tuple of suffixes to strip, each already ending in '.csv'.
+    """
+    filename = os.path.basename(filepath)
+    base_name = _strip_suffixes(filename, suffix_csvs, ".csv")
+
+    if required_columns or usecols is not None:
+        # Validate against the header alone, so an invalid file fails before
+        # its body is parsed
+        header = pd.read_csv(filepath, nrows=0).columns
+        _check_required_columns(header, required_columns, filename)
+
+    if usecols is not None:
+        # Restrict the parse to the requested columns, always keeping the
+        # required and numeric ones, and skipping those absent from the header
+        columns = dict.fromkeys([*usecols, *(required_columns or []), *numeric_columns])
+        usecols = [col for col in columns if col in header]
+
+    # The tokenizer already types clean numeric columns (integers stay int64),
+    # so only columns holding non-numeric values need a second pass
+    backend_kwargs = {} if dtype_backend is None else {"dtype_backend": dtype_backend}
+    df = _read_csv(filepath, usecols, chunksize, backend_kwargs, engine)
+
+    # Convert remaining non-numeric columns, coercing errors to NaN
+    to_convert = [
+        col for col in numeric_columns if not pd.api.types.is_numeric_dtype(df[col])
+    ]
+    if to_convert:
+        df[to_convert] = df[to_convert].apply(
+            pd.to_numeric, errors="coerce", **backend_kwargs
+        )
+    return base_name, df
 
 
 def load_csv_files(
-    data_dir, suffixes_to_remove, numeric_columns, required_columns=None
+    data_dir,
+    suffixes_to_remove,
+    numeric_columns,
+    required_columns=None,
+    max_workers=None,
+    usecols=None,
+    chunksize=None,
+    dtype_backend=None,
+    engine="c",
 ):
     """
     Load multiple CSV files from a directory, clean their filenames, ensure specified columns are numeric,
     and verify the presence of required columns.
+
+    Files are parsed concurrently in a thread pool, since the pandas C parser
+    releases the GIL while tokenizing.
+
+    :param max_workers: Maximum number of threads used to read files.
+                        Defaults to min(number of files, os.cpu_count()).
+    :param usecols: Optional list of columns to read. Required and numeric columns
+                    are always read. If None, all columns are read.
+    :param chunksize: Optional number of rows to parse at a time, bounding the
+                      parser's working memory on very large files. Chunks are
+                      concatenated once per file. If None, each file is read in one pass.
+    :param dtype_backend: Optional pandas dtype backend ('pyarrow' or 'numpy_nullable').
+                          With 'pyarrow', columns are Arrow-backed (e.g. string[pyarrow]).
+                          If None, NumPy dtypes are used.
+    :param engine: pandas CSV parser ('c' or 'pyarrow'). The PyArrow reader is
+                   multithreaded per file but infers types differently (e.g. ISO
+                   dates become datetime64), so it is opt-in. Ignored when
+                   chunksize is set.
+    """
+    filepaths = [entry.path for entry in scan_files(data_dir, ".csv")]
+    if not filepaths:
+        return {}
+
+    if max_workers is None:
+        max_workers = min(len(filepaths), os.cpu_count() or 1)
+
+    suffix_csvs = tuple(suffix + ".csv" for suffix in suffixes_to_remove)
+
+    def load(filepath):
+        return _load_csv_file(
+            filepath, suffix_csvs, numeric_columns, required_columns, usecols,
+            chunksize, dtype_backend, engine,
+        )
+
+    if max_workers <= 1:
+        return dict(map(load, filepaths))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(executor.map(load, filepaths))
+
+
+def _require_parquet():
+    if pq is None:
+        raise ImportError(
+            "Parquet support requires pyarrow. Install it with: pip install '.[fast]'"
+        )
+
+
+def maybe_convert_csvs_to_parquet(
+    data_dir, numeric_columns=(), compression="zstd"
+):
+    """
+    Write a Parquet copy next to each CSV file in a directory, so later runs can
+    use load_parquet_files instead of parsing the CSVs again.
+
+    Files whose Parquet copy is at least as recent as the CSV are skipped.
+
+    :param data_dir: Directory containing the CSV files.
+    :param numeric_columns: Columns to store as numbers (parsed as in load_csv_files).
+    :param compression: Parquet compression codec.
+    :return: List of Parquet paths that were (re)written.
+    """
+    _require_parquet()
+    written = []
+    for entry in scan_files(data_dir, ".csv"):
+        target = entry.path[: -len(".csv")] + ".parquet"
+        if (
+            os.path.exists(target)
+            and os.stat(target).st_mtime_ns >= entry.stat().st_mtime_ns
+        ):
+            continue
+        _, df = _load_csv_file(entry.path, (), numeric_columns, None, None)
+        df.to_parquet(target, compression=compression, index=False)
+        written.append(target)
+    return written
+
+
+def load_parquet_files(
+    data_dir, suffixes_to_remove, required_columns=None, columns=None
+):
+    """
+    Load multiple Parquet files from a directory, cleaning their filenames like
+    load_csv_files and verifying the presence of required columns.
+
+    Parquet columns are already typed, so no numeric conversion is needed.
+
+    :param data_dir: Directory containing the Parquet files.
+    :param suffixes_to_remove: Filename suffixes to strip from the station names.
+    :param required_columns: Columns that must be present in every file.
+    :param columns: Optional list of columns to read. Required columns are always
+                    read. If None, all columns are read.
+    :return: Dictionary of DataFrames indexed by cleaned filenames.
     """
+    _require_parquet()
+    suffix_parquets = tuple(suffix + ".parquet" for suffix in suffixes_to_remove)
     data = {}
-    for filename in os.listdir(data_dir):
-        if filename.endswith(".csv"):
-            base_name = filename
-            # Remove specified suffixes
-            for suffix in suffixes_to_remove:
-                if filename.endswith(suffix + ".csv"):
-                    base_name = filename.replace(suffix, "")
-                    break
-            base_name = base_name.replace(".csv", "")
-            filepath = os.path.join(data_dir, filename)
-            df = pd.read_csv(filepath)
-
-            # Check for required columns
-            if required_columns:
-                missing_cols = [
-                    col for col in required_columns if col not in df.columns
-                ]
-                if missing_cols:
-                    raise KeyError(f"Missing columns {missing_cols} in file {filename}")
-
-            # Convert specified columns to numeric, coercing errors
-            df[numeric_columns] = df[numeric_columns].apply(
-                pd.to_numeric, errors="coerce"
-            )
-            data[base_name] = df
+    for entry in scan_files(data_dir, ".parquet"):
+        # Validate against the schema alone before reading any column
+        schema_names = pq.read_schema(entry.path).names
+        _check_required_columns(schema_names, required_columns, entry.name)
+
+        read_columns = None
+        if columns is not None:
+            wanted = dict.fromkeys([*columns, *(required_columns or [])])
+            read_columns = [col for col in wanted if col in schema_names]
+
+        base_name = _strip_suffixes(entry.name, suffix_parquets, ".parquet")
+        data[base_name] = pd.read_parquet(entry.path, columns=read_columns)
     return data
 
 
-def load_netcdf_files_with_zoom(data_dir, variable_names, lat_range=None, lon_range=None):
+def load_netcdf_files(data_dir, variable_names, chunks=NETCDF_CHUNKS):
+    """
+    Load NetCDF files from the specified directory, focusing on specific variables.
+
+    :param data_dir: Directory containing the NetCDF files.
+    :param variable_names: List of variables to extract from each file.
+    :param chunks: Dask chunk sizes used to open the files lazily (None if dask is not installed).
+    :return: Dictionary of datasets indexed by filenames.
+    """
+    return load_netcdf_files_with_zoom(data_dir, variable_names, chunks=chunks)
+
+
+def load_netcdf_file(
+    filepath, variable_names, lat_range=None, lon_range=None, chunks=NETCDF_CHUNKS
+):
+    """
+    Load the specified variables from a single NetCDF file, optionally extracting
+    a zoomed region.
+
+    The file is opened lazily (dask-backed when available) and without CF decoding;
+    masking and scaling are applied only to the selected region, and times are
+    left undecoded.
+
+    :param filepath: Path to the NetCDF file.
+    :param variable_names: List of variables to extract from the file.
+    :param lat_range: Optional tuple (lat_min, lat_max) for zooming into a latitude range.
+    :param lon_range: Optional tuple (lon_min, lon_max) for zooming into a longitude range.
+    :param chunks: Dask chunk sizes used to open the file lazily (None if dask is not installed).
+    :return: xarray Dataset with the selected variables.
+    """
+    filename = os.path.basename(filepath)
+    ds = xr.open_dataset(filepath, chunks=chunks, decode_cf=False)
+
+    # Ensure the required variables are present
+    missing_vars = [var for var in variable_names if var not in ds.variables]
+    if missing_vars:
+        raise KeyError(f"Missing variables {missing_vars} in NetCDF file {filename}")
+
+    # Select the specific region if lat_range and lon_range are provided
+    region = ds
+
+    if lat_range is not None and lon_range is not None:
+        lat_min, lat_max = lat_range
+        lon_min, lon_max = lon_range
+
+        # Ensure the coordinates are included in the dataset
+        if 'lat' in ds and 'lon' in ds:
+            region = ds.sel(lat=slice(lat_min, lat_max), lon=slice(lon_min, lon_max))
+        else:
+            raise ValueError("Latitude and Longitude coordinates not found in the dataset.")
+
+    # Keep only the required variables and decode just the selected region
+    return xr.decode_cf(region[variable_names], decode_times=False)
+
+
+def load_netcdf_files_with_zoom(
+    data_dir, variable_names, lat_range=None, lon_range=None, chunks=NETCDF_CHUNKS
+):
     """
     Load NetCDF files from the specified directory, focusing on specific variables
     and optionally extracting a zoomed region.
@@ -54,56 +293,25 @@ def load_netcdf_files_with_zoom(data_dir, variable_names, lat_range=None, lon_ra
     :param variable_names: List of variables to extract from each file.
     :param lat_range: Optional tuple (lat_min, lat_max) for zooming into a latitude range.
     :param lon_range: Optional tuple (lon_min, lon_max) for zooming into a longitude range.
+    :param chunks: Dask chunk sizes used to open the files lazily (None if dask is not installed).
     :return: Dictionary of datasets indexed by filenames.
     """
-    data = {}
-    
-    for filename in os.listdir(data_dir):
-        if filename.endswith(".nc"):
-            file_path = os.path.join(data_dir, filename)
-            ds = xr.open_dataset(file_path)
-            
-            # Ensure the required variables are present
-            missing_vars = [var for var in variable_names if var not in ds.variables]
-            if missing_vars:
-                raise KeyError(f"Missing variables {missing_vars} in NetCDF file {filename}")
-            
-            # Select the specific region if lat_range and lon_range are provided
-            region = ds
-            
-            if lat_range is not None and lon_range is not None:
-                lat_min, lat_max = lat_range
-                lon_min, lon_max = lon_range
-                
-                # Ensure the coordinates are included in the dataset
-                if 'lat' in ds and 'lon' in ds:
-                    region = ds.sel(lat=slice(lat_min, lat_max), lon=slice(lon_min, lon_max))
-                else:
-                    raise ValueError("Latitude and Longitude coordinates not found in the dataset.")
-
-            # Keep only the required variables
-            data[filename] = region[variable_names]
-
-    return data
+    return {
+        entry.name: load_netcdf_file(
+            entry.path, variable_names, lat_range, lon_range, chunks=chunks
+        )
+        for entry in scan_files(data_dir, ".nc")
+    }
 
 
 def extract_ctd_coordinates(df, lat_column, lon_column):
     """
     Extract CTD coordinates from a DataFrame.
-    """
-    return list(zip(df[lat_column], df[lon_column]))
-
 
-def combine_data(data_dict, station_id_column):
-    """
-    Combine multiple DataFrames into a single DataFrame with a station identifier.
+    :return: Array of shape (N, 2) with (latitude, longitude) rows.
     """
-    combined_df = pd.DataFrame()
-    for station_id, df in data_dict.items():
-        df_copy = df.copy()
-        df_copy[station_id_column] = station_id
-        combined_df = pd.concat([combined_df, df_copy], ignore_index=True)
-    return combined_df
+    return df[[lat_column, lon_column]].to_numpy(dtype=np.float64)
+
 
 def load_all_data(
     bottle_data_dir,
@@ -130,6 +338,9 @@ def load_all_data(
         "upoly0",
         "CTD_depth",
     ],
+    usecols_bottle=None,  # Colonne da leggere dai file delle bottiglie
+    usecols_profile=None,  # Colonne da leggere dai file dei profili
+    csv_engine="c",  # Parser dei CSV ('c' o 'pyarrow', da attivare esplicitamente)
     bathymetry_variables=["elevation"],  # Variabili da estrarre dai file NetCDF
     station_id_column="Station_ID",
     extract_coordinates=True,
@@ -158,33 +369,57 @@ def load_all_data(
         "CTD_depth",
     ]
 
-    # Carica i dati delle bottiglie
-    data["bottle_data"] = load_csv_files(
-        data_dir=bottle_data_dir,
-        suffixes_to_remove=suffixes_to_remove_bottle,
-        numeric_columns=bottle_numeric_columns,
-        required_columns=bottle_required_columns,
-    )
+    # Avvia in background il caricamento dei profili, che non dipende dalle
+    # bottiglie: la lettura dei CSV si sovrappone al lavoro sul thread principale.
+    # Il blocco with attende il thread anche se il resto del caricamento fallisce
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        profile_future = executor.submit(
+            load_csv_files,
+            data_dir=profile_data_dir,
+            suffixes_to_remove=suffixes_to_remove_profile,
+            numeric_columns=profile_numeric_columns,
+            required_columns=profile_required_columns,
+            usecols=usecols_profile,
+            engine=csv_engine,
+        )
 
-    # Filtra le stazioni se specificato
-    if station_filter:
-        data["bottle_data"] = {
-            station_id: df for station_id, df in data["bottle_data"].items()
-            if station_id in station_filter
-        }
+        # Carica i dati delle bottiglie
+        data["bottle_data"] = load_csv_files(
+            data_dir=bottle_data_dir,
+            suffixes_to_remove=suffixes_to_remove_bottle,
+            numeric_columns=bottle_numeric_columns,
+            required_columns=bottle_required_columns,
+            usecols=usecols_bottle,
+            engine=csv_engine,
+        )
 
-    # Assegna i tipi di bottiglie utilizzando il dizionario
-    data["bottle_data"] = assign_bottle_types_to_stations(
-        data["bottle_data"], bottle_type_dict
-    )
+        # Filtra le stazioni se specificato
+        if station_filter:
+            data["bottle_data"] = {
+                station_id: df for station_id, df in data["bottle_data"].items()
+                if station_id in station_filter
+            }
 
-    # Carica i dati dei profili
-    data["profile_data"] = load_csv_files(
-        data_dir=profile_data_dir,
-        suffixes_to_remove=suffixes_to_remove_profile,
-        numeric_columns=profile_numeric_columns,
-        required_columns=profile_required_columns,
-    )
+        # Assegna i tipi di bottiglie utilizzando il dizionario
+        data["bottle_data"] = assign_bottle_types_to_stations(
+            data["bottle_data"], bottle_type_dict
+        )
+
+        # Carica i dati di batimetria
+        bathymetry_dir = os.path.dirname(bathymetry_file)
+        bathymetry_filename = os.path.basename(bathymetry_file)
+        if os.path.isfile(bathymetry_file):
+            # Apri direttamente il file richiesto invece di scansionare la directory
+            data["bathymetry"] = load_netcdf_file(
+                bathymetry_file, bathymetry_variables, lat_bounds, lon_bounds
+            )
+        else:
+            raise FileNotFoundError(
+                f"Bathymetry file {bathymetry_filename} not found in directory {bathymetry_dir}."
+            )
+
+        # Attendi il caricamento dei profili avviato in background
+        data["profile_data"] = profile_future.result()
 
     # Filtra i dati dei profili se specificato
     if station_filter:
@@ -193,40 +428,31 @@ def load_all_data(
             if station_id in station_filter
         }
 
-    # Carica i dati di batimetria
-    bathymetry_dir = os.path.dirname(bathymetry_file)
-    bathymetry_filename = os.path.basename(bathymetry_file)
-    data["bathymetry"] = load_netcdf_files_with_zoom(
-        data_dir=bathymetry_dir,
-        variable_names=bathymetry_variables,
-        lat_range=lat_bounds,  # Passa i limiti di latitudine
-        lon_range=lon_bounds   # Passa i limiti di longitudine
-    ).get(bathymetry_filename, None)
-
-    if data["bathymetry"] is None:
-        raise FileNotFoundError(
-            f"Bathymetry file {bathymetry_filename} not found in directory {bathymetry_dir}."
-        )
-
     # Combine bottle data
     data["combined_bottle_data"] = combine_data(
         data_dict=data["bottle_data"], station_id_column=station_id_column
     )
 
-    # Extract CTD coordinates
-    if extract_coordinates:
-        data["ctd_coordinates"] = {}
-        for station_id, df in data["bottle_data"].items():
+    # Extract CTD coordinates and calculate cumulative distances in one pass
+    if extract_coordinates or calculate_distances:
+        station_coords = {}
+        if data["bottle_data"]:
+            # Il dataframe combinato è ordinato per stazione: una sola conversione
+            # e poi viste per ciascuna stazione
             coords = extract_ctd_coordinates(
-                df, lat_column="CTD_lat", lon_column="CTD_lon"
+                data["combined_bottle_data"], lat_column="CTD_lat", lon_column="CTD_lon"
+            )
+            boundaries = np.cumsum([len(df) for df in data["bottle_data"].values()])
+            station_coords = dict(
+                zip(data["bottle_data"], np.split(coords, boundaries[:-1]))
             )
-            data["ctd_coordinates"][station_id] = coords
-
-    # Calculate cumulative distances
-    if calculate_distances:
-        data["cumulative_distances"] = {}
-        for station_id, coords in data["ctd_coordinates"].items():
-            distances = calculate_cumulative_distances(coords, method=method)
-            data["cumulative_distances"][station_id] = distances
+
+        if extract_coordinates:
+            data["ctd_coordinates"] = station_coords
+        if calculate_distances:
+            data["cumulative_distances"] = {
+                station_id: calculate_cumulative_distances(coords, method=method)
+                for station_id, coords in station_coords.items()
+            }
 
     return data
\ No newline at end of file
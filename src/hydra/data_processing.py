@@ -1,24 +1,38 @@
 # src/hydra/data_processing.py
 
+import numpy as np
 import pandas as pd
 
 
-def combine_data(data_dict, station_id_column):
+def combine_data(data_dict, station_id_column, categorical_station_id=False):
     """
     Combine multiple DataFrames into a single DataFrame with a station identifier.
 
     :param data_dict: Dictionary of DataFrames.
     :param station_id_column: Column name to use as station identifier.
+    :param categorical_station_id: If True, store the station identifier column as a
+                                   pandas Categorical (integer codes per row).
     :return: Combined DataFrame.
     """
     if not isinstance(data_dict, dict):
         raise TypeError("data_dict must be a dictionary")
 
-    combined_df = pd.DataFrame()
-    for station_id, df in data_dict.items():
-        df = df.copy()
-        df[station_id_column] = station_id
-        combined_df = pd.concat([combined_df, df], ignore_index=True)
+    items = list(data_dict.items())
+    if not items:
+        return pd.DataFrame()
+
+    station_ids = [station_id for station_id, _ in items]
+    lengths = [len(df) for _, df in items]
+    combined_df = pd.concat([df for _, df in items], ignore_index=True)
+    # Write all station labels in one allocation instead of one column per frame
+    codes = np.repeat(np.arange(len(station_ids)), lengths)
+    if categorical_station_id:
+        combined_df[station_id_column] = pd.Categorical.from_codes(
+            codes, categories=station_ids
+        )
+    else:
+        # Take the labels through a pandas Index so mixed keys (e.g. 1 and "S2") keep their types
+        combined_df[station_id_column] = pd.Index(station_ids).take(codes).to_numpy()
     return combined_df
 
 
@@ -42,19 +56,23 @@ def filter_data_by_temperature(df, min_temp, temperature_column="temperature"):
     if not isinstance(min_temp, (int, float)):
         raise TypeError("min_temp must be a numeric value.")
 
-    filtered_df = df[df[temperature_column] >= min_temp].reset_index(drop=True)
+    # Compare on the raw array and take the matching rows by position
+    temperatures = df[temperature_column].to_numpy(dtype=np.float64, na_value=np.nan)
+    filtered_df = df.iloc[np.flatnonzero(temperatures >= min_temp)].reset_index(drop=True)
 
     return filtered_df
 
 
-def extract_dna_samples_from_bottle_data(config):
+def extract_dna_samples_from_bottle_data(config, as_arrays=False):
     """
     Extract DNA samples from bottle data based on station and bottle IDs specified in the config.
 
     :param config: The configuration dictionary containing bottle data and dna_samples mapping.
-    :return: A list of dictionaries with station ID, bottle, longitude, and latitude for each DNA sample.
+    :param as_arrays: If True, return one array per field instead of one dictionary per sample.
+    :return: A list of dictionaries with station ID, bottle, longitude, and latitude for each DNA sample,
+             or with as_arrays a dictionary of arrays under the same keys.
     """
-    dna_samples = []
+    station_ids, bottles, lons, lats = [], [], [], []
 
     # Loop through each station in the dna_samples configuration
     for station_id, bottle_list in config["dna_samples"].items():
@@ -63,21 +81,34 @@ def extract_dna_samples_from_bottle_data(config):
             bottle_data = config["bottle_data"][station_id]
 
             # Filter the bottle_data for the specified DNA sample bottles
-            dna_bottles = bottle_data[bottle_data["Bottle"].isin(bottle_list)]
-
-            # Extract the relevant info: station, bottle, longitude, latitude
-            for _, row in dna_bottles.iterrows():
-                dna_samples.append(
-                    {
-                        "station_id": station_id,
-                        "bottle": row["Bottle"],
-                        "lon": row[
-                            "CTD_lon"
-                        ],  # Assuming your bottle data has these columns
-                        "lat": row[
-                            "CTD_lat"
-                        ],  # Assuming your bottle data has these columns
-                    }
-                )
-
-    return dna_samples
+            dna_bottles = bottle_data.loc[
+                bottle_data["Bottle"].isin(bottle_list), ["Bottle", "CTD_lon", "CTD_lat"]
+            ]
+
+            # Collect the relevant info column-wise: station, bottle, longitude, latitude
+            station_ids.append(np.full(len(dna_bottles), station_id, dtype=object))
+            bottles.append(dna_bottles["Bottle"].to_numpy())
+            lons.append(dna_bottles["CTD_lon"].to_numpy())
+            lats.append(dna_bottles["CTD_lat"].to_numpy())
+
+    columns = {
+        key: np.concatenate(arrays) if arrays else np.empty(0)
+        for key, arrays in (
+            ("station_id", station_ids),
+            ("bottle", bottles),
+            ("lon", lons),
+            ("lat", lats),
+        )
+    }
+    if as_arrays:
+        return columns
+
+    return [
+        {"station_id": station_id, "bottle": bottle, "lon": lon, "lat": lat}
+        for station_id, bottle, lon, lat in zip(
+            columns["station_id"].tolist(),
+            columns["bottle"].tolist(),
+            columns["lon"].tolist(),
+            columns["lat"].tolist(),
+        )
+    ]
@@ -1,6 +1,749 @@
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+import matplotlib
 import matplotlib.pyplot as plt
 import numpy as np
-import os
+from matplotlib.cm import ScalarMappable
+from matplotlib.collections import LineCollection
+from matplotlib.colors import ListedColormap, Normalize
+from matplotlib.lines import Line2D
+
+from hydra.utilities import bottle_lookup_indices
+
+# Matplotlib 3.6+ contours with ContourPy and accepts its faster "serial" algorithm;
+# an installed contourpy alone does not mean the installed Matplotlib takes the keyword
+if tuple(int(part) for part in matplotlib.__version__.split(".")[:2]) >= (3, 6):
+    CONTOURF_KWARGS = {"algorithm": "serial"}
+else:  # pragma: no cover - Matplotlib < 3.6
+    CONTOURF_KWARGS = {}
+
+# Configuration entries sent to per-station map worker processes (besides profile_data)
+STATION_MAP_CONFIG_KEYS = ("bottle_type_dict", "vents", "plot_labels", "plot_settings", "output_paths")
+
+# Scatters with at least this many points are rasterized in vector outputs
+RASTERIZE_MIN_POINTS = 1000
+
+# Configuration entries sent to per-station profile worker processes (besides the station data)
+STATION_PROFILE_CONFIG_KEYS = ("bottle_type_dict", "plot_labels", "plot_settings", "output_paths")
+
+logger = logging.getLogger(__name__)
+
+# Environment variable that switches PNG output to light zlib compression (larger files, faster saves)
+FAST_PNG_ENV = "HYDRA_FAST_PNG"
+
+# Profile columns cached as contiguous arrays by _station_arrays
+SOA_COLUMNS = ("CTD_lon", "CTD_lat", "CTD_depth", "Bottle", "timeS")
+
+# Columns only drawn on screen, stored as float32 to halve the bytes moved while plotting
+SOA_FLOAT32_COLUMNS = ("CTD_lon", "CTD_lat", "CTD_depth")
+
+
+class _StationCache(NamedTuple):
+    """Arrays of one station's profile, with memoized bottle positions."""
+
+    arrays: dict
+    memo: dict
+
+
+def _station_cache(config, station_id, station_cache=None):
+    """
+    Return a station's arrays and bottle-position memo, building them when not in station_cache.
+
+    station_cache is a plain dictionary owned by one plotting call, so edits made to the
+    DataFrames between calls are always picked up.
+
+    :param config: Configuration dictionary containing 'profile_data'.
+    :param station_id: Station identifier.
+    :param station_cache: Optional dictionary reused across calls to keep each station's entry.
+    :return: _StationCache entry, or None if the station has no data.
+    """
+    if station_cache is not None and station_id in station_cache:
+        return station_cache[station_id]
+    df = config["profile_data"].get(station_id, None)
+    if df is None:
+        return None
+    arrays = {}
+    for column in SOA_COLUMNS:
+        if column not in df.columns:
+            continue
+        if column in SOA_FLOAT32_COLUMNS:
+            values = df[column].to_numpy(dtype=np.float32, na_value=np.nan)
+        else:
+            values = df[column].to_numpy()
+        arrays[column] = np.ascontiguousarray(values)
+    cached = _StationCache(arrays, {})
+    if station_cache is not None:
+        station_cache[station_id] = cached
+    return cached
+
+
+def _station_arrays(config, station_id, station_cache=None):
+    """
+    Return a station's profile columns as contiguous NumPy arrays.
+
+    Coordinates and depths are stored as float32; Bottle and timeS keep their dtype.
+
+    :param config: Configuration dictionary containing 'profile_data'.
+    :param station_id: Station identifier.
+    :param station_cache: Optional dictionary reused across calls to keep each station's arrays.
+    :return: Dictionary mapping the available SOA_COLUMNS to arrays, or None if the station has no data.
+    """
+    cached = _station_cache(config, station_id, station_cache)
+    return None if cached is None else cached.arrays
+
+
+def _coordinate_bounds(config, station_ids, station_cache=None):
+    """
+    Compute CTD coordinate bounds over several stations with vectorized reductions.
+
+    :param config: Configuration dictionary containing 'profile_data'.
+    :param station_ids: Stations to include (stations without data are skipped).
+    :param station_cache: Optional dictionary of station arrays, see _station_cache.
+    :return: Tuple (lon_min, lon_max, lat_min, lat_max), or None if there are no coordinates.
+    """
+    arrays = [_station_arrays(config, station_id, station_cache) for station_id in station_ids]
+    arrays = [a for a in arrays if a is not None]
+    if not arrays:
+        return None
+    lons = np.concatenate([a["CTD_lon"] for a in arrays])
+    lats = np.concatenate([a["CTD_lat"] for a in arrays])
+    if np.isnan(lons).all() or np.isnan(lats).all():
+        return None
+    return (
+        float(np.nanmin(lons)),
+        float(np.nanmax(lons)),
+        float(np.nanmin(lats)),
+        float(np.nanmax(lats)),
+    )
+
+
+def _save_figure(fig, path, dpi):
+    """
+    Save a figure, writing PNGs with compression level 1 when HYDRA_FAST_PNG is set.
+
+    :param fig: Matplotlib figure to save.
+    :param path: Output path; the format follows its extension.
+    :param dpi: Output resolution.
+    """
+    kwargs = {}
+    if os.environ.get(FAST_PNG_ENV, "0") not in ("", "0") and str(path).lower().endswith(".png"):
+        kwargs["pil_kwargs"] = {"compress_level": 1}
+    fig.savefig(path, dpi=dpi, **kwargs)
+
+
+class BathymetryArrays(NamedTuple):
+    """
+    Bathymetry grid as plain float32 arrays, ready for plotting.
+
+    Build it once with BathymetryArrays.from_dataset and store it as config["bathymetry"]
+    to skip the xarray access and float32 conversion on every plot call.
+    """
+
+    lon: np.ndarray
+    lat: np.ndarray
+    depths: np.ndarray  # Shaped (len(lat), len(lon))
+
+    @classmethod
+    def from_dataset(cls, bathy):
+        """
+        Extract the longitude, latitude and depth arrays of a bathymetry dataset.
+
+        :param bathy: xarray Dataset with 'lon', 'lat' and 'elevation' variables.
+        :return: BathymetryArrays of float32 arrays.
+        :raises ValueError: If the elevation values do not fill the lat x lon grid.
+        """
+        lon = bathy["lon"].values
+        lat = bathy["lat"].values
+        depths = bathy["elevation"].values
+
+        # Check the shapes before converting, so an invalid grid is rejected without copying it
+        if lon.ndim != 1 or lat.ndim != 1 or depths.size != lon.size * lat.size:
+            raise ValueError(
+                f"Bathymetry elevation of shape {depths.shape} does not match "
+                f"{lat.size} latitudes and {lon.size} longitudes."
+            )
+
+        # float32 is well beyond pixel precision and halves the bytes streamed while drawing
+        lon = lon.astype(np.float32, copy=False)
+        lat = lat.astype(np.float32, copy=False)
+        depths = depths.astype(np.float32, copy=False).reshape(lat.size, lon.size)
+        return cls(lon, lat, depths)
+
+
+def _bathymetry_grid(bathy):
+    """
+    Return the bathymetry of a configuration as (lon, lat, depths) arrays.
+
+    :param bathy: xarray Dataset with 'lon', 'lat' and 'elevation' variables, or BathymetryArrays.
+    :return: BathymetryArrays (unpacks as a (lon, lat, depths) tuple).
+    """
+    if isinstance(bathy, BathymetryArrays):
+        return bathy
+    return BathymetryArrays.from_dataset(bathy)
+
+
+def _index_range(values, low, high):
+    """
+    Slice of a monotonic coordinate array covering [low, high], plus one cell on each side.
+
+    :param values: Ascending or descending 1D coordinate array.
+    :param low: Lower coordinate bound.
+    :param high: Upper coordinate bound.
+    :return: slice into values.
+    """
+    descending = values.size > 1 and values[0] > values[-1]
+    ordered = values[::-1] if descending else values
+    start = max(np.searchsorted(ordered, low, side="right") - 1, 0)
+    stop = min(np.searchsorted(ordered, high, side="left") + 1, values.size)
+    if descending:
+        start, stop = values.size - stop, values.size - start
+    return slice(start, stop)
+
+
+def _crop_grid(lon, lat, depths, bounds, margin=0.01):
+    """
+    Crop a bathymetry grid to coordinate bounds with a margin.
+
+    The full grid is returned when the bounds cover less than two cells in either direction.
+
+    :param bounds: Tuple (lon_min, lon_max, lat_min, lat_max).
+    :param margin: Margin in degrees added around the bounds.
+    :return: Cropped (lon, lat, depths).
+    """
+    lon_min, lon_max, lat_min, lat_max = bounds
+    lon_slice = _index_range(lon, lon_min - margin, lon_max + margin)
+    lat_slice = _index_range(lat, lat_min - margin, lat_max + margin)
+    if lon_slice.stop - lon_slice.start < 2 or lat_slice.stop - lat_slice.start < 2:
+        return lon, lat, depths
+    return lon[lon_slice], lat[lat_slice], depths[lat_slice, lon_slice]
+
+
+def _axis_pixels(ax, dpi):
+    """
+    Return the size of an axis in output pixels.
+
+    :param ax: Matplotlib axis.
+    :param dpi: Resolution the figure will be saved at.
+    :return: Tuple (width, height) in pixels.
+    """
+    width, height = ax.get_position().size * ax.figure.get_size_inches() * dpi
+    return max(1, int(np.ceil(width))), max(1, int(np.ceil(height)))
+
+
+def _subsample_grid(lon, lat, depths, pixels):
+    """
+    Decimate a bathymetry grid so it has about one cell per output pixel.
+
+    Each direction keeps every n-th cell, with n chosen so that at least as many cells as pixels
+    remain; grids already at or below the pixel count are returned unchanged.
+
+    :param pixels: Tuple (width, height) of the axis in output pixels.
+    :return: Subsampled (lon, lat, depths); depths may also be an RGBA image.
+    """
+    lon_stride = max(1, lon.size // pixels[0])
+    lat_stride = max(1, lat.size // pixels[1])
+    if lon_stride == 1 and lat_stride == 1:
+        return lon, lat, depths
+    return lon[::lon_stride], lat[::lat_stride], depths[::lat_stride, ::lon_stride]
+
+
+def _is_evenly_spaced(values, rtol=1e-3):
+    """
+    Check that a 1D coordinate array has a constant, non-zero step.
+    """
+    if values.size < 2:
+        return False
+    steps = np.diff(values.astype(np.float64))
+    return bool(steps[0] != 0 and np.allclose(steps, steps[0], rtol=rtol, atol=0))
+
+
+def _draw_bathymetry_image(ax, lon, lat, depths, **kwargs):
+    """
+    Draw an evenly spaced grid with imshow, one pixel per cell.
+
+    Descending axes are flipped (as views) so the image extent is always increasing.
+    """
+    if lon[0] > lon[-1]:
+        lon, depths = lon[::-1], depths[:, ::-1]
+    if lat[0] > lat[-1]:
+        lat, depths = lat[::-1], depths[::-1]
+    half_dx = (lon[-1] - lon[0]) / (lon.size - 1) / 2
+    half_dy = (lat[-1] - lat[0]) / (lat.size - 1) / 2
+    extent = (lon[0] - half_dx, lon[-1] + half_dx, lat[0] - half_dy, lat[-1] + half_dy)
+    return ax.imshow(
+        depths, extent=extent, origin="lower", aspect="auto", interpolation="nearest", **kwargs
+    )
+
+
+def _bathymetry_colors(grid):
+    """
+    Colormap a bathymetry grid once so several axes can show it as an RGBA image.
+
+    :param grid: Tuple (lon, lat, depths) as returned by _bathymetry_grid.
+    :return: Tuple (rgba, mappable): a uint8 array of shape depths.shape + (4,) and the
+             ScalarMappable holding the norm and colormap, for colorbars.
+    """
+    depths = grid[2]
+    mappable = ScalarMappable(norm=Normalize(np.nanmin(depths), np.nanmax(depths)), cmap="viridis")
+    return mappable.to_rgba(depths, bytes=True), mappable
+
+
+def _draw_bathymetry(ax, grid, mode="auto", bounds=None, colors=None, pixels=None):
+    """
+    Draw a bathymetry grid on an axis.
+
+    :param ax: Matplotlib axis to draw on.
+    :param grid: Tuple (lon, lat, depths) as returned by _bathymetry_grid.
+    :param mode: 'auto' (imshow for evenly spaced grids, else pcolormesh), 'imshow',
+                 'pcolormesh' (continuous colors) or 'contourf' (40 filled levels).
+    :param bounds: Optional (lon_min, lon_max, lat_min, lat_max) to crop the grid to before drawing.
+    :param colors: Optional (rgba, mappable) from _bathymetry_colors for an evenly spaced grid;
+                   the precomputed image is shown instead of colormapping the depths again.
+    :param pixels: Optional (width, height) of the axis in output pixels; larger grids are
+                   subsampled to about one cell per pixel.
+    :return: The mappable, for use with a colorbar.
+    """
+    lon, lat, depths = grid
+    if colors is not None:
+        rgba, mappable = colors
+        if bounds is not None:
+            lon, lat, rgba = _crop_grid(lon, lat, rgba, bounds)
+        if pixels is not None:
+            lon, lat, rgba = _subsample_grid(lon, lat, rgba, pixels)
+        _draw_bathymetry_image(ax, lon, lat, rgba, alpha=0.7)
+        return mappable
+
+    if bounds is not None:
+        lon, lat, depths = _crop_grid(lon, lat, depths, bounds)
+    if pixels is not None:
+        lon, lat, depths = _subsample_grid(lon, lat, depths, pixels)
+
+    if mode == "auto":
+        evenly_spaced = _is_evenly_spaced(lon) and _is_evenly_spaced(lat)
+        mode = "imshow" if evenly_spaced else "pcolormesh"
+
+    # Meshes and contours are rasterized so vector outputs (PDF, SVG) embed one image at the savefig dpi
+    if mode == "imshow":
+        return _draw_bathymetry_image(ax, lon, lat, depths, cmap="viridis", alpha=0.7)
+    if mode == "pcolormesh":
+        return ax.pcolormesh(
+            lon, lat, depths, cmap="viridis", alpha=0.7, shading="auto", rasterized=True
+        )
+    if mode == "contourf":
+        contours = ax.contourf(lon, lat, depths, levels=40, alpha=0.7, cmap="viridis", **CONTOURF_KWARGS)
+        if hasattr(contours, "set_rasterized"):
+            contours.set_rasterized(True)
+        else:  # pragma: no cover - Matplotlib < 3.8 keeps one collection per level
+            for collection in contours.collections:
+                collection.set_rasterized(True)
+        return contours
+    raise ValueError("Invalid bathymetry_mode. Choose 'auto', 'imshow', 'pcolormesh' or 'contourf'.")
+
+
+def _bottle_type_positions(df, station_bottle_types, include_bottle_types, bottles=None):
+    """
+    Find a station's row positions for each bottle type, classifying the Bottle column in a single pass.
+
+    :param df: Station DataFrame with a 'Bottle' column.
+    :param station_bottle_types: Dictionary mapping bottle types to bottle numbers for the station.
+    :param include_bottle_types: Bottle types to return, in plotting order.
+    :param bottles: Optional array of the Bottle column (e.g. from _station_arrays).
+    :return: List of (bottle_type, positions) pairs for the non-empty bottle types, positions
+             being ascending integer row positions into df.
+    """
+    bottle_lists = {
+        bottle_type: station_bottle_types.get(bottle_type) or []
+        for bottle_type in include_bottle_types
+    }
+
+    if bottles is None:
+        bottles = df["Bottle"].to_numpy()
+    lookup = bottle_lookup_indices(bottles, bottle_lists)
+    if lookup is not None:
+        # Integer bottles: select each type with a gather from a boolean lookup table
+        indices, size = lookup
+        selections = []
+        for bottle_type, numbers in bottle_lists.items():
+            if not numbers:
+                continue
+            table = np.zeros(size, dtype=bool)
+            table[np.asarray(numbers, dtype=np.intp)] = True
+            selections.append((bottle_type, np.flatnonzero(table[indices])))
+        return [(bt, positions) for bt, positions in selections if positions.size]
+
+    bottle_to_type = {}
+    shared_bottles = False
+    for bottle_type, numbers in bottle_lists.items():
+        for bottle in numbers:
+            shared_bottles |= bottle_to_type.setdefault(bottle, bottle_type) != bottle_type
+
+    if shared_bottles:
+        # A bottle belongs to several types: filter each type separately
+        selections = [
+            (bottle_type, np.flatnonzero(df["Bottle"].isin(numbers).to_numpy()))
+            for bottle_type, numbers in bottle_lists.items()
+        ]
+        return [(bt, positions) for bt, positions in selections if positions.size]
+    if not bottle_to_type:
+        return []
+    groups = df.groupby(df["Bottle"].map(bottle_to_type), sort=False).indices
+    return [(bt, groups[bt]) for bt in bottle_lists if bt in groups]
+
+
+def _station_bottle_positions(config, station_id, include_bottle_types, station_cache=None):
+    """
+    Memoized _bottle_type_positions for a station with data.
+
+    Results are kept in the station's station_cache entry, keyed by the requested bottle types
+    and their bottle numbers, so a station that appears in several groups of one plot is
+    classified once.
+
+    :param config: Configuration dictionary with 'profile_data' and optionally 'bottle_type_dict'.
+    :param station_id: Station identifier (its profile_data entry must not be None).
+    :param include_bottle_types: Bottle types to return, in plotting order.
+    :param station_cache: Optional dictionary of station entries, see _station_cache.
+    :return: List of (bottle_type, positions) pairs, as returned by _bottle_type_positions.
+    """
+    cached = _station_cache(config, station_id, station_cache)
+    station_bottle_types = config.get("bottle_type_dict", {}).get(station_id, {})
+    key = tuple(
+        (bottle_type, tuple(station_bottle_types.get(bottle_type) or ()))
+        for bottle_type in include_bottle_types
+    )
+    if key not in cached.memo:
+        cached.memo[key] = _bottle_type_positions(
+            config["profile_data"][station_id],
+            station_bottle_types,
+            include_bottle_types,
+            cached.arrays.get("Bottle"),
+        )
+    return cached.memo[key]
+
+
+def _draw_stations(
+    ax,
+    config,
+    station_ids,
+    station_colors,
+    station_index,
+    include_bottle_types,
+    autoscale=True,
+    station_cache=None,
+):
+    """
+    Draw station paths as one LineCollection and bottle positions as one scatter.
+
+    :param ax: Matplotlib axis to draw on.
+    :param config: Configuration dictionary with 'profile_data' and 'bottle_type_dict'.
+    :param station_ids: Stations to draw.
+    :param station_colors: RGBA array of shape (num_stations, 4).
+    :param station_index: Dictionary mapping station IDs to rows of station_colors.
+    :param include_bottle_types: Bottle types to mark along the paths.
+    :param autoscale: Update the axis limits from the paths. Pass False when the caller sets the
+                      limits from precomputed bounds, so the path data is not traversed again.
+    :param station_cache: Optional dictionary of station arrays, see _station_cache.
+    :return: Tuple (artists, legend_handles); the handles list one entry per station and bottle type.
+    """
+    segments, segment_rows, legend_handles = [], [], []
+    bottle_lon, bottle_lat, bottle_rows, bottle_counts = [], [], [], []
+
+    for station_id in station_ids:
+        arrays = _station_arrays(config, station_id, station_cache)
+        if arrays is None:
+            continue
+        row = station_index[station_id]
+        color = station_colors[row]
+        segments.append(np.column_stack([arrays["CTD_lon"], arrays["CTD_lat"]]))
+        segment_rows.append(row)
+        legend_handles.append(
+            Line2D([], [], color=color, linestyle='-', linewidth=2, label=f"Station {station_id}")
+        )
+
+        # Collect bottle positions, colored by station
+        if "Bottle" in arrays:
+            for bottle_type, positions in _station_bottle_positions(
+                config, station_id, include_bottle_types, station_cache
+            ):
+                bottle_lon.append(arrays["CTD_lon"][positions])
+                bottle_lat.append(arrays["CTD_lat"][positions])
+                bottle_rows.append(row)
+                bottle_counts.append(positions.size)
+                legend_handles.append(
+                    Line2D([], [], color=color, marker="o", linestyle="", label=bottle_type)
+                )
+
+    artists = []
+    if segments:
+        paths = LineCollection(
+            segments, colors=station_colors[segment_rows], linewidths=2, rasterized=True
+        )
+        ax.add_collection(paths, autolim=autoscale)
+        if autoscale:
+            ax.autoscale_view()
+        artists.append(paths)
+    if bottle_lon:
+        num_points = sum(bottle_counts)
+        # Color by integer station codes through one colormap instead of per-point RGBA rows
+        artists.append(
+            ax.scatter(
+                np.concatenate(bottle_lon),
+                np.concatenate(bottle_lat),
+                c=np.repeat(bottle_rows, bottle_counts),
+                cmap=ListedColormap(station_colors),
+                vmin=-0.5,
+                vmax=len(station_colors) - 0.5,
+                rasterized=num_points >= RASTERIZE_MIN_POINTS,
+            )
+        )
+    return artists, legend_handles
+
+
+def _unique_handles(handles):
+    """
+    Drop legend handles whose label was already seen, keeping the first of each label.
+    """
+    unique = {}
+    for handle in handles:
+        unique.setdefault(handle.get_label(), handle)
+    return list(unique.values())
+
+
+def _set_map_limits(ax, bounds, margin=0.01):
+    """
+    Set axis limits to coordinate bounds with a margin.
+
+    :param bounds: Tuple (lon_min, lon_max, lat_min, lat_max).
+    """
+    ax.set_xlim(bounds[0] - margin, bounds[1] + margin)
+    ax.set_ylim(bounds[2] - margin, bounds[3] + margin)
+
+
+def _draw_map_background(
+    ax,
+    config,
+    grid,
+    include_vents,
+    bathymetry_mode,
+    title,
+    bounds=None,
+    bathymetry_colors=None,
+    subsample=True,
+):
+    """
+    Draw the parts of a map that do not depend on the stations: bathymetry, vents and labels.
+
+    :param ax: Matplotlib axis to draw on.
+    :param config: Configuration dictionary (optionally with 'vents'; plot_settings['vent_labels']
+                   set to False leaves out the vent names, plot_settings['bathy_subsample'] set to
+                   False draws every bathymetry cell instead of about one per output pixel).
+    :param grid: Tuple (lon, lat, depths) from _bathymetry_grid, or None to skip the bathymetry.
+    :param include_vents: Whether to plot the hydrothermal vents.
+    :param bathymetry_mode: 'auto', 'imshow', 'pcolormesh' or 'contourf'.
+    :param title: Axis title.
+    :param bounds: Optional (lon_min, lon_max, lat_min, lat_max) to crop the bathymetry to.
+    :param bathymetry_colors: Optional precomputed image from _bathymetry_colors.
+    :param subsample: Whether the bathymetry may be subsampled to the axis' pixel count; pass
+                      False when the axis will be zoomed in after drawing, since the pixel
+                      budget only holds for the extent drawn here.
+    :return: List with the vent scatter (empty without vents), for the legend.
+    """
+    if grid is not None:
+        lon, lat, _ = grid
+        plot_settings = config.get("plot_settings", {})
+        pixels = None
+        if subsample and plot_settings.get("bathy_subsample", True):
+            pixels = _axis_pixels(ax, plot_settings.get("dpi", ax.figure.dpi))
+        contours = _draw_bathymetry(
+            ax, grid, bathymetry_mode, bounds=bounds, colors=bathymetry_colors, pixels=pixels
+        )
+        plt.colorbar(contours, label='Depth (m)', ax=ax)
+        ax.set_xlim(lon.min(), lon.max())
+        ax.set_ylim(lat.min(), lat.max())
+
+    # Plot all hydrothermal vents with a single scatter call
+    vent_artists = []
+    if include_vents and config.get("vents"):
+        coordinates = np.array(
+            [vent_info["coordinates"] for vent_info in config["vents"].values()], dtype=np.float64
+        )
+        vent_artists.append(
+            ax.scatter(
+                coordinates[:, 1],
+                coordinates[:, 0],
+                marker="^",
+                s=100,
+                color="orange",
+                label="Hydrothermal vents",
+            )
+        )
+
+        # Name each vent next to its marker; text artists are cheap compared to one scatter per vent
+        if config.get("plot_settings", {}).get("vent_labels", True):
+            for (lat, lon), vent_info in zip(coordinates, config["vents"].values()):
+                if vent_info.get("name"):
+                    ax.annotate(
+                        vent_info["name"],
+                        (lon, lat),
+                        xytext=(4, 4),
+                        textcoords="offset points",
+                        fontsize=8,
+                    )
+
+    ax.set_xlabel("Longitude")
+    ax.set_ylabel("Latitude")
+    ax.set_title(title)
+    return vent_artists
+
+
+def _draw_map_axes(
+    ax,
+    config,
+    station_ids,
+    station_colors,
+    station_index,
+    include_bottle_types,
+    grid,
+    include_vents,
+    bathymetry_mode,
+    title,
+    bathymetry_colors=None,
+    station_cache=None,
+):
+    """
+    Draw a complete map of several stations on one axis.
+
+    :param ax: Matplotlib axis to draw on.
+    :param config: Configuration dictionary (profile_data, bottle_type_dict, vents).
+    :param station_ids: Stations to draw; the axis is zoomed to their coordinates.
+    :param station_colors: RGBA array of shape (num_stations, 4).
+    :param station_index: Dictionary mapping station IDs to rows of station_colors.
+    :param include_bottle_types: Bottle types to mark along the paths.
+    :param grid: Tuple (lon, lat, depths) from _bathymetry_grid, or None to skip the bathymetry.
+    :param include_vents: Whether to plot the hydrothermal vents.
+    :param bathymetry_mode: 'auto', 'imshow', 'pcolormesh' or 'contourf'.
+    :param title: Axis title.
+    :param bathymetry_colors: Optional precomputed image from _bathymetry_colors.
+    :param station_cache: Optional dictionary of station arrays shared by the axes of one plot,
+                          see _station_cache.
+    :return: The stations' coordinate bounds, or None if they have no coordinates.
+    """
+    if station_cache is None:
+        station_cache = {}
+    bounds = _coordinate_bounds(config, station_ids, station_cache)
+    vent_artists = _draw_map_background(
+        ax,
+        config,
+        grid,
+        include_vents,
+        bathymetry_mode,
+        title,
+        bounds=bounds,
+        bathymetry_colors=bathymetry_colors,
+    )
+    _, legend_handles = _draw_stations(
+        ax,
+        config,
+        station_ids,
+        station_colors,
+        station_index,
+        include_bottle_types,
+        autoscale=bounds is None,
+        station_cache=station_cache,
+    )
+    if bounds is not None:
+        _set_map_limits(ax, bounds)
+
+    legend_handles += vent_artists
+    if legend_handles:
+        ax.legend(handles=_unique_handles(legend_handles))
+    return bounds
+
+
+def _save_station_maps(
+    config,
+    station_ids,
+    station_colors,
+    station_index,
+    include_bottle_types,
+    grid,
+    include_vents,
+    bathymetry_mode,
+):
+    """
+    Save one map per station, drawing the shared background only once.
+
+    The bathymetry, vents and labels are drawn on a single reused figure; only the
+    station artists are replaced between saves.
+
+    :param config: Configuration dictionary (profile_data, bottle_type_dict, vents, output_paths, plot_settings).
+    :param station_ids: Stations to save a map for.
+    :param station_colors: RGBA array of shape (num_stations, 4).
+    :param station_index: Dictionary mapping station IDs to rows of station_colors.
+    :param include_bottle_types: Bottle types to mark along the paths.
+    :param grid: Tuple (lon, lat, depths) from _bathymetry_grid, or None to skip the bathymetry.
+    :param include_vents: Whether to plot the hydrothermal vents.
+    :param bathymetry_mode: 'auto', 'imshow', 'pcolormesh' or 'contourf'.
+    :return: None. Saves map_plot_<station>.png files in the subplot output directory.
+    """
+    fig, ax = plt.subplots(figsize=(12, 8))
+    title = config.get("plot_labels", {}).get("map_title", "HYDRA Map Plot")
+    # Every station zooms into the shared background, so it keeps the grid's full resolution
+    vent_artists = _draw_map_background(
+        ax, config, grid, include_vents, bathymetry_mode, title, subsample=False
+    )
+    base_xlim, base_ylim = ax.get_xlim(), ax.get_ylim()
+    subplot_dir = config["output_paths"]["subplot"]
+    dpi = config["plot_settings"]["dpi"]
+    station_cache = {}  # Arrays of this call's stations, shared by drawing and zooming
+
+    for station_id in station_ids:
+        # Plot the station path and bottle types; the limits are set below
+        station_artists, station_handles = _draw_stations(
+            ax,
+            config,
+            [station_id],
+            station_colors,
+            station_index,
+            include_bottle_types,
+            autoscale=False,
+            station_cache=station_cache,
+        )
+
+        # Zoom to the station's data, or back to the full map if it has none
+        limits = _coordinate_bounds(config, [station_id], station_cache)
+        if limits is not None:
+            _set_map_limits(ax, limits)
+        else:
+            ax.set_xlim(base_xlim)
+            ax.set_ylim(base_ylim)
+
+        handles = station_handles + vent_artists
+        if handles:
+            ax.legend(handles=_unique_handles(handles))
+        elif ax.get_legend() is not None:
+            ax.get_legend().remove()
+        fig.tight_layout()
+
+        # Save each station's plot separately
+        _save_figure(fig, f"{subplot_dir}/map_plot_{station_id}.png", dpi)
+
+        # Remove this station's artists before drawing the next one
+        for artist in station_artists:
+            artist.remove()
+
+    plt.close(fig)
+
+
+def _station_maps_worker(args):
+    """
+    Process-pool entry point for _save_station_maps, rendering with the Agg backend.
+    """
+    plt.switch_backend("Agg")
+    _save_station_maps(*args)
+
 
 def generalized_map_plot(
     config,
@@ -11,9 +754,13 @@ def generalized_map_plot(
     create_subplots=False,
     subplot_groups=None,
     plot_all_together=True,
+    max_workers=None,
 ):
     """
     Generate a generalized map plot with the option to handle multiple bottle types (e.g., DNA, Hydrogen).
+
+    :param max_workers: Number of processes used to save per-station maps (create_subplots without
+                        subplot_groups). None or 1 saves them serially in this process.
     """
     if include_bottle_types is None:
         include_bottle_types = config.get("bottle_type_dict", {}).keys()
@@ -22,246 +769,245 @@ def generalized_map_plot(
     if subplot_groups is None:
         subplot_groups = config.get("subplot_groups", [])
 
+    bathymetry_mode = config.get("plot_settings", {}).get("bathymetry_mode", "auto")
+
     # Define a color map for the stations, based on the number of unique stations
     num_stations = len(config["stations"]["included"])
     color_map = plt.get_cmap("tab10", num_stations)  # Use qualitative color map with distinct colors
-    station_colors = {station: color_map(i) for i, station in enumerate(config["stations"]["included"])}
-
-    # Calculate the overall latitude and longitude bounds for each subgroup
-    subgroup_limits = {}
-
-    for group in subplot_groups:
-        group_lon = []
-        group_lat = []
-        # Loop through each station in the group and gather coordinates
-        for station_id in group:
-            df = config["profile_data"].get(station_id, None)
-            if df is not None:
-                group_lon.extend(df["CTD_lon"].values)
-                group_lat.extend(df["CTD_lat"].values)
-
-        # Debugging: Print collected values for each group
-        print(f"Group: {group}")
-        print(f"Longitude values: {group_lon}")
-        print(f"Latitude values: {group_lat}")
-
-        # Ensure valid coordinates are present before calculating limits
-        if group_lon and group_lat:
-            subgroup_limits[tuple(group)] = (min(group_lon), max(group_lon), min(group_lat), max(group_lat))  # Store limits for each group
-        else:
-            print(f"No valid coordinates found for group: {group}")
+    station_index = {station: i for i, station in enumerate(config["stations"]["included"])}
+    station_colors = color_map(np.arange(num_stations))  # RGBA rows, indexed through station_index
+
+    title = config.get("plot_labels", {}).get("map_title", "HYDRA Map Plot")
+    dpi = config["plot_settings"]["dpi"]
+    grid = None
+    if include_bathymetry and config.get("bathymetry") is not None:
+        grid = _bathymetry_grid(config["bathymetry"])  # Extracted once for every axis
 
     if create_subplots and subplot_groups:
-        # Create separate plots for each station in the group
+        # Create one subplot per group of stations
         num_groups = len(subplot_groups)
         cols = 2
         rows = (num_groups + cols - 1) // cols  # Dynamic row calculation
-        fig, axes = plt.subplots(rows, cols, figsize=(12, 6 * rows))
+        fig, axes = plt.subplots(rows, cols, figsize=(12, 6 * rows), squeeze=False)
         axes = axes.flatten()
 
-        for idx, group in enumerate(subplot_groups):
-            ax = axes[idx]  # Get the current subplot axis
-            plt.sca(ax)  # Set the current axis to ax
-
-            # Plot bathymetry if included
-            if include_bathymetry and config.get("bathymetry") is not None:
-                bathy = config["bathymetry"]
-                lon = bathy["lon"].values
-                lat = bathy["lat"].values
-                depths = bathy["elevation"].values
-
-                if depths.ndim == 2:
-                    depths = depths.reshape(len(lat), len(lon))
-
-                contours = ax.contourf(lon, lat, depths, levels=40, alpha=0.7, cmap="viridis")
-                plt.colorbar(contours, label='Depth (m)', ax=ax)
-
-            # Plot station paths and bottle types for each station in the group
-            group_lon = []
-            group_lat = []
-            for station_id in group:
-                df = config["profile_data"].get(station_id, None)
-                if df is not None:
-                    ax.plot(df["CTD_lon"], df["CTD_lat"], color=station_colors[station_id], label=f"Station {station_id}", linestyle='-', linewidth=2)
-
-                    # Collect coordinates for zooming
-                    group_lon.extend(df["CTD_lon"].values)
-                    group_lat.extend(df["CTD_lat"].values)
-
-                    # Plot bottle types
-                    if "Bottle" in df.columns:
-                        for bottle_type in include_bottle_types:
-                            bottles = config["bottle_type_dict"].get(station_id, {}).get(bottle_type, [])
-                            bottle_df = df[df["Bottle"].isin(bottles)]
-                            if not bottle_df.empty:
-                                ax.scatter(
-                                    bottle_df["CTD_lon"],
-                                    bottle_df["CTD_lat"],
-                                    color=station_colors[station_id],  # Use station color
-                                    label=bottle_type,
-                                )
-
-            # Set limits for the subplot based on the group's stations with a margin
-            if (group_lon and group_lat):
-                ax.set_xlim(min(group_lon) - 0.01, max(group_lon) + 0.01)
-                ax.set_ylim(min(group_lat) - 0.01, max(group_lat) + 0.01)
-            else:
-                print(f"No valid coordinates for limits in group: {group}")
-
-            # Plot hydrothermal vents if included
-            if include_vents and config.get("vents") is not None:
-                for vent_id, vent_info in config["vents"].items():
-                    ax.scatter(
-                        vent_info["coordinates"][1],
-                        vent_info["coordinates"][0],
-                        marker="D",
-                        color="orange",
-                        label=vent_info["name"],
-                    )
+        # Remove the unused grid cells so layout and saving skip them
+        for ax in axes[num_groups:]:
+            fig.delaxes(ax)
 
-            # Set plot labels and title
-            ax.set_xlabel("Longitude")
-            ax.set_ylabel("Latitude")
-            ax.set_title(f"{config.get('plot_labels', {}).get('map_title', 'HYDRA Map Plot')} - Group {idx + 1}")
-            ax.legend()
+        # Colormap an evenly spaced grid once; each subplot shows a cropped view of the image
+        bathymetry_colors = None
+        if (
+            grid is not None
+            and bathymetry_mode in ("auto", "imshow")
+            and _is_evenly_spaced(grid[0])
+            and _is_evenly_spaced(grid[1])
+        ):
+            bathymetry_colors = _bathymetry_colors(grid)
 
-        plt.tight_layout()
-        plt.savefig(f"{config['output_paths']['subplot']}/map_plot_groups.png", dpi=config["plot_settings"]["dpi"])
-        plt.close()
+        station_cache = {}  # Station arrays, shared by the groups of this call
+        for idx, group in enumerate(subplot_groups):
+            logger.debug("Drawing group %s", group)
+            bounds = _draw_map_axes(
+                axes[idx],
+                config,
+                group,
+                station_colors,
+                station_index,
+                include_bottle_types,
+                grid,
+                include_vents,
+                bathymetry_mode,
+                f"{title} - Group {idx + 1}",
+                bathymetry_colors=bathymetry_colors,
+                station_cache=station_cache,
+            )
+            if bounds is None:
+                logger.warning("No valid coordinates found for group: %s", group)
+
+        fig.tight_layout()
+        _save_figure(fig, f"{config['output_paths']['subplot']}/map_plot_groups.png", dpi)
+        plt.close(fig)
 
     elif create_subplots and not subplot_groups:
         # Create a single plot for each included station
-        for station_id in config["stations"]["included"]:
-            plt.figure(figsize=(12, 8))
-            
-            if include_bathymetry and config.get("bathymetry") is not None:
-                bathy = config["bathymetry"]
-                lon = bathy["lon"].values
-                lat = bathy["lat"].values
-                depths = bathy["elevation"].values
-
-                if depths.ndim == 2:
-                    depths = depths.reshape(len(lat), len(lon))
-
-                contours = plt.contourf(lon, lat, depths, levels=40, alpha=0.7, cmap="viridis")
-                plt.colorbar(contours, label='Depth (m)')
-                plt.xlim(lon.min(), lon.max())
-                plt.ylim(lat.min(), lat.max())
-
-            # Plot the station path
-            df = config["profile_data"].get(station_id, None)
-            if df is not None:
-                plt.plot(df["CTD_lon"], df["CTD_lat"], color=station_colors[station_id], label=f"Station {station_id}", linestyle='-', linewidth=2)
-
-                # Plot bottle types
-                if "Bottle" in df.columns:
-                    for bottle_type in include_bottle_types:
-                        bottles = config["bottle_type_dict"].get(station_id, {}).get(bottle_type, [])
-                        bottle_df = df[df["Bottle"].isin(bottles)]
-                        if not bottle_df.empty:
-                            plt.scatter(
-                                bottle_df["CTD_lon"],
-                                bottle_df["CTD_lat"],
-                                color=station_colors[station_id],  # Use station color
-                                label=bottle_type,
-                            )
-
-            # Set limits for the individual plot based on the station's data with a margin
-            if df is not None:
-                plt.xlim(df["CTD_lon"].min() - 0.01, df["CTD_lon"].max() + 0.01)
-                plt.ylim(df["CTD_lat"].min() - 0.01, df["CTD_lat"].max() + 0.01)
-
-            # Plot hydrothermal vents if included
-            if include_vents:
-                for vent_id, vent_info in config["vents"].items():
-                    plt.scatter(
-                        vent_info["coordinates"][1],
-                        vent_info["coordinates"][0],
-                        marker="^",
-                        s=100,
-                        color="orange",
-                        label=vent_info["name"],
-                    )
+        station_ids = list(config["stations"]["included"])
 
-            plt.xlabel("Longitude")
-            plt.ylabel("Latitude")
-            plt.title(config.get("plot_labels", {}).get("map_title", "HYDRA Map Plot"))
-            plt.legend()
-            plt.tight_layout()
-
-            # Save each station's plot separately
-            plt.savefig(f"{config['output_paths']['subplot']}/map_plot_{station_id}.png", dpi=config["plot_settings"]["dpi"])
-            plt.close()
+        if max_workers is None or max_workers <= 1 or len(station_ids) <= 1:
+            _save_station_maps(
+                config,
+                station_ids,
+                station_colors,
+                station_index,
+                list(include_bottle_types),
+                grid,
+                include_vents,
+                bathymetry_mode,
+            )
+        else:
+            # Render chunks of stations in separate processes; each worker only
+            # receives the profiles of its own stations.
+            num_chunks = min(max_workers, len(station_ids))
+            chunks = [station_ids[i::num_chunks] for i in range(num_chunks)]
+            shared = {key: config[key] for key in STATION_MAP_CONFIG_KEYS if key in config}
+            tasks = [
+                (
+                    dict(shared, profile_data={sid: config["profile_data"].get(sid) for sid in chunk}),
+                    chunk,
+                    station_colors,
+                    station_index,
+                    list(include_bottle_types),
+                    grid,
+                    include_vents,
+                    bathymetry_mode,
+                )
+                for chunk in chunks
+            ]
+            with ProcessPoolExecutor(max_workers=len(tasks)) as executor:
+                list(executor.map(_station_maps_worker, tasks))
 
     else:
         # Classic behavior for plotting all together
-        plt.figure(figsize=(12, 8))
+        fig, ax = plt.subplots(figsize=(12, 8))
+        _draw_map_axes(
+            ax,
+            config,
+            config["stations"]["included"],
+            station_colors,
+            station_index,
+            include_bottle_types,
+            grid,
+            include_vents,
+            bathymetry_mode,
+            title,
+        )
+        fig.tight_layout()  # Adjust layout for better spacing
+        _save_figure(fig, config["output_paths"]["map"], dpi)
+        plt.close(fig)
 
-        # Plot bathymetry data if included
-        if include_bathymetry and config.get("bathymetry") is not None:
-            bathy = config["bathymetry"]
-            lon = bathy["lon"].values
-            lat = bathy["lat"].values
-            depths = bathy["elevation"].values
-
-            if depths.ndim == 2:
-                depths = depths.reshape(len(lat), len(lon))
-
-            contours = plt.contourf(lon, lat, depths, levels=40, alpha=0.7, cmap="viridis")
-            plt.colorbar(contours, label='Depth (m)')
-            plt.xlim(lon.min(), lon.max())
-            plt.ylim(lat.min(), lat.max())
-
-        # Plot station paths and bottle types for all stations included
-        all_lon = []
-        all_lat = []
-        for station_id in config["stations"]["included"]:
-            df = config["profile_data"].get(station_id, None)
-            if df is not None:
-                plt.plot(df["CTD_lon"], df["CTD_lat"], color=station_colors[station_id], label=f"Station {station_id}", linestyle='-', linewidth=2)
-
-                # Collect coordinates for zooming
-                all_lon.extend(df["CTD_lon"].values)
-                all_lat.extend(df["CTD_lat"].values)
-
-                # Plot bottle types
-                if "Bottle" in df.columns:
-                    for bottle_type in include_bottle_types:
-                        bottles = config["bottle_type_dict"].get(station_id, {}).get(bottle_type, [])
-                        bottle_df = df[df["Bottle"].isin(bottles)]
-                        if not bottle_df.empty:
-                            plt.scatter(
-                                bottle_df["CTD_lon"],
-                                bottle_df["CTD_lat"],
-                                color=station_colors[station_id],  # Use station color
-                                label=bottle_type,
-                            )
-
-        # Set limits with a margin for all stations
-        if all_lon and all_lat:
-            plt.xlim(min(all_lon) - 0.01, max(all_lon) + 0.01)
-            plt.ylim(min(all_lat) - 0.01, max(all_lat) + 0.01)
-
-        # Plot hydrothermal vents if included
-        if include_vents:
-            for vent_id, vent_info in config["vents"].items():
-                plt.scatter(
-                    vent_info["coordinates"][1],
-                    vent_info["coordinates"][0],
-                    marker="^",
-                    s=100,
-                    color="orange",
-                    label=vent_info["name"],
-                )
 
-        # Set plot labels and title
-        plt.xlabel("Longitude")
-        plt.ylabel("Latitude")
-        plt.title(config.get("plot_labels", {}).get("map_title", "HYDRA Map Plot"))
-        plt.legend()
-        plt.tight_layout()  # Adjust layout for better spacing
-        plt.savefig(config["output_paths"]["map"], dpi=config["plot_settings"]["dpi"])
-        plt.close()
+def _profile_x(config, station_id, axis_config, cumulative_distances, station_cache=None):
+    """
+    Return the x values of a station's profile and the matching axis label.
+
+    :param axis_config: 'time' (timeS column) or 'distance' (cumulative distances).
+    :param cumulative_distances: Dictionary mapping station IDs to cumulative distances.
+    :param station_cache: Optional dictionary of station arrays, see _station_cache.
+    :return: Tuple (x array, xlabel).
+    """
+    if axis_config == "time":
+        return _station_arrays(config, station_id, station_cache)["timeS"], "Time (s)"
+    if axis_config == "distance":
+        if station_id in cumulative_distances:
+            return np.asarray(cumulative_distances[station_id], dtype=np.float64), "Distance (km)"
+        raise ValueError(f"Cumulative distances not calculated for station {station_id}.")
+    raise ValueError("axis_config must be 'time' or 'distance'.")
+
+
+def _draw_profiles(
+    ax, config, station_ids, axis_config, include_bottle_types, x_cache=None, station_cache=None
+):
+    """
+    Draw one depth line per (station, bottle type) as a single LineCollection.
+
+    Each line only covers the rows of its bottle type, so x and depth always have the same length.
+
+    :param ax: Matplotlib axis to draw on.
+    :param config: Configuration dictionary with 'profile_data' and optionally 'bottle_type_dict'
+                   and 'cumulative_distances'.
+    :param station_ids: Stations to draw.
+    :param axis_config: 'time' or 'distance' for the x-axis.
+    :param include_bottle_types: Bottle types to draw.
+    :param x_cache: Optional dictionary reused across calls to keep each station's (x, xlabel),
+                    so stations shared by several groups are only resolved once.
+    :param station_cache: Optional dictionary of station arrays reused across calls in the same
+                          way, see _station_cache.
+    :return: Tuple (legend_handles, xlabel); xlabel is '' if no station has data.
+    """
+    if x_cache is None:
+        x_cache = {}
+    if station_cache is None:
+        station_cache = {}
+    profile_data = config["profile_data"]
+    cumulative_distances = config.get("cumulative_distances", {})
+    segments, legend_handles = [], []
+    xlabel = ""
+
+    for station_id in station_ids:
+        df = profile_data.get(station_id, None)
+        if df is None:
+            continue
+        if station_id not in x_cache:
+            x_cache[station_id] = _profile_x(
+                config, station_id, axis_config, cumulative_distances, station_cache
+            )
+        x, xlabel = x_cache[station_id]
+        arrays = _station_arrays(config, station_id, station_cache)
+        for bottle_type, positions in _station_bottle_positions(
+            config, station_id, include_bottle_types, station_cache
+        ):
+            color = f"C{len(segments) % 10}"  # Same color cycle as successive plot() calls
+            segments.append(np.column_stack([x[positions], arrays["CTD_depth"][positions]]))
+            legend_handles.append(Line2D([], [], color=color, label=f"{station_id} - {bottle_type}"))
+
+    if segments:
+        ax.add_collection(
+            LineCollection(
+                segments, colors=[h.get_color() for h in legend_handles], rasterized=True
+            )
+        )
+        ax.autoscale_view()
+    return legend_handles, xlabel
+
+
+def _save_station_profiles(config, station_ids, axis_config, include_bottle_types):
+    """
+    Save one profile plot per station on a single reused figure.
+
+    :param config: Configuration dictionary (profile_data, bottle_type_dict, cumulative_distances,
+                   output_paths, plot_settings, plot_labels).
+    :param station_ids: Stations with data to save a profile for.
+    :param axis_config: 'time' or 'distance' for the x-axis.
+    :param include_bottle_types: Bottle types to draw.
+    :return: None. Saves profile_plot_<station>.png files in the subplot output directory.
+    """
+    fig, ax = plt.subplots(figsize=(12, 8))
+    ax.set_ylabel("CTD Depth (m)")
+    title = config.get("plot_labels", {}).get("profile_title", "CTD Profiles")
+    subplot_dir = config["output_paths"]["subplot"]
+    dpi = config.get("plot_settings", {}).get("dpi", 100)
+
+    for station_id in station_ids:
+        num_collections = len(ax.collections)
+        legend_handles, xlabel = _draw_profiles(
+            ax, config, [station_id], axis_config, include_bottle_types
+        )
+        station_artists = list(ax.collections[num_collections:])
+
+        ax.set_xlabel(xlabel)
+        ax.set_title(f"{title} - Station {station_id}")
+        if legend_handles:
+            ax.legend(handles=legend_handles)
+        elif ax.get_legend() is not None:
+            ax.get_legend().remove()
+
+        _save_figure(fig, f"{subplot_dir}/profile_plot_{station_id}.png", dpi)
+
+        # Remove this station's lines and reset the data limits before the next one
+        for artist in station_artists:
+            artist.remove()
+        ax.relim()
+
+    plt.close(fig)
+
+
+def _station_profiles_worker(args):
+    """
+    Process-pool entry point for _save_station_profiles, rendering with the Agg backend.
+    """
+    plt.switch_backend("Agg")
+    _save_station_profiles(*args)
+
 
 def generalized_profile_plot(
     config,
@@ -273,6 +1019,7 @@ def generalized_profile_plot(
     output_filename="profiles.png",
     plot_all_together=True,  # If True, plot all stations in one plot; else, separate plots
     grouping_list=None,  # List of lists containing station IDs for grouping
+    max_workers=None,  # Processes used for separate per-station plots
 ):
     """
     Generate profile plots for specified stations, allowing visualization of different bottle types (e.g., DNA, Hydrogen).
@@ -286,6 +1033,8 @@ def generalized_profile_plot(
     :param output_filename: Filename for the output plot.
     :param plot_all_together: If True, plot all stations in one plot; if False, plot separately.
     :param grouping_list: List of lists containing station IDs for grouping.
+    :param max_workers: Number of processes used to save separate per-station plots
+                        (plot_all_together=False). None or 1 saves them serially in this process.
     :return: None. Saves the plot as a PNG file.
     """
     if stations_to_plot is None:
@@ -294,108 +1043,91 @@ def generalized_profile_plot(
     if include_bottle_types is None:
         include_bottle_types = config["bottle_type_dict"].keys()
 
+    # Look up the configuration entries used for every figure once
+    profile_title = config.get("plot_labels", {}).get("profile_title", "CTD Profiles")
+    dpi = config.get("plot_settings", {}).get("dpi", 100)
+    x_cache = {}  # Station x values, shared by the groups of this call
+    station_cache = {}  # Station arrays, shared the same way
+
     # If creating subplots and grouping is defined
     if create_subplots and grouping_list:
         num_groups = len(grouping_list)
         cols = num_cols
         rows = (num_groups + cols - 1) // cols
-        fig, axes = plt.subplots(rows, cols, figsize=(6 * cols, 4 * rows))
+        fig, axes = plt.subplots(rows, cols, figsize=(6 * cols, 4 * rows), squeeze=False)
         axes = axes.flatten()
 
+        # Remove the unused grid cells so layout and saving skip them
+        for ax in axes[num_groups:]:
+            fig.delaxes(ax)
+
         for idx, group in enumerate(grouping_list):
             ax = axes[idx]
-            xlabel = ""  # Initialize xlabel for each subplot
-            for station_id in group:
-                df = config["profile_data"].get(station_id, None)
-                if df is not None:
-                    if axis_config == "time":
-                        x = df["timeS"]
-                        xlabel = "Time (s)"
-                    elif axis_config == "distance":
-                        if station_id in config.get("cumulative_distances", {}):
-                            x = config["cumulative_distances"][station_id]
-                            xlabel = "Distance (km)"
-                        else:
-                            raise ValueError(
-                                f"Cumulative distances not calculated for station {station_id}."
-                            )
-                    else:
-                        raise ValueError("axis_config must be 'time' or 'distance'.")
-
-                    bottle_type_dict = config.get("bottle_type_dict", {})
-                    for bottle_type in include_bottle_types:
-                        bottles = bottle_type_dict.get(station_id, {}).get(bottle_type, [])
-                        bottle_df = df[df["Bottle"].isin(bottles)]
-                        if not bottle_df.empty:
-                            ax.plot(
-                                x,
-                                bottle_df["CTD_depth"],
-                                label=f"{station_id} - {bottle_type}",
-                            )
+            legend_handles, xlabel = _draw_profiles(
+                ax, config, group, axis_config, include_bottle_types, x_cache, station_cache
+            )
 
             if xlabel:
                 ax.set_xlabel(xlabel)
             ax.set_ylabel("CTD Depth (m)")
-            ax.set_title(f"{config.get('plot_labels', {}).get('profile_title', 'CTD Profiles')} - Group {idx + 1}")
+            ax.set_title(f"{profile_title} - Group {idx + 1}")
 
             # Add legend only if there are labels
-            handles, labels = ax.get_legend_handles_labels()
-            if labels:
-                ax.legend()
+            if legend_handles:
+                ax.legend(handles=legend_handles)
 
         plt.tight_layout()
 
         # Save each group plot separately with an adaptable name
-        plt.savefig(
-            f"{config['output_paths']['subplot']}/profile_plot_group.png",
-            dpi=config.get("plot_settings", {}).get("dpi", 100)
-        )
+        _save_figure(fig, f"{config['output_paths']['subplot']}/profile_plot_group.png", dpi)
         plt.close()
 
     elif plot_all_together:
         plt.figure(figsize=(12, 8))
-        xlabel = ""  # Initialize xlabel
-        for station_id in stations_to_plot:
-            df = config["profile_data"].get(station_id, None)
-            if df is not None:
-                if axis_config == "time":
-                    x = df["timeS"]
-                    xlabel = "Time (s)"
-                elif axis_config == "distance":
-                    if station_id in config.get("cumulative_distances", {}):
-                        x = config["cumulative_distances"][station_id]
-                        xlabel = "Distance (km)"
-                    else:
-                        raise ValueError(
-                            f"Cumulative distances not calculated for station {station_id}."
-                        )
-                else:
-                    raise ValueError("axis_config must be 'time' or 'distance'.")
-
-                # Use the dictionary for bottle types
-                bottle_type_dict = config.get("bottle_type_dict", {})
-                for bottle_type in include_bottle_types:
-                    bottles = bottle_type_dict.get(station_id, {}).get(bottle_type, [])
-                    bottle_df = df[df["Bottle"].isin(bottles)]  # Use the dictionary for bottle numbers
-                    if not bottle_df.empty:
-                        plt.plot(
-                            x,
-                            bottle_df["CTD_depth"],
-                            label=f"{station_id} - {bottle_type}",
-                        )
+        legend_handles, xlabel = _draw_profiles(
+            plt.gca(), config, stations_to_plot, axis_config, include_bottle_types
+        )
 
         if xlabel:  # Ensure xlabel is assigned
             plt.xlabel(xlabel)
         plt.ylabel("CTD Depth (m)")
-        plt.title(config.get("plot_labels", {}).get("profile_title", "CTD Profiles"))
+        plt.title(profile_title)
 
         # Add legend only if there are labels
-        handles, labels = plt.gca().get_legend_handles_labels()
-        if labels:
-            plt.legend()
+        if legend_handles:
+            plt.legend(handles=legend_handles)
 
-        plt.savefig(
-            config["output_paths"]["profile"],  # Use the path from config
-            dpi=config.get("plot_settings", {}).get("dpi", 100)
-        )
-        plt.close()
\ No newline at end of file
+        _save_figure(plt.gcf(), config["output_paths"]["profile"], dpi)  # Use the path from config
+        plt.close()
+
+    else:
+        # Save a separate plot for each station with data
+        profile_data = config["profile_data"]
+        station_ids = [sid for sid in stations_to_plot if profile_data.get(sid) is not None]
+        include_bottle_types = list(include_bottle_types)
+
+        if max_workers is None or max_workers <= 1 or len(station_ids) <= 1:
+            _save_station_profiles(config, station_ids, axis_config, include_bottle_types)
+        else:
+            # Each worker only receives the profiles and distances of its own stations
+            num_chunks = min(max_workers, len(station_ids))
+            chunks = [station_ids[i::num_chunks] for i in range(num_chunks)]
+            shared = {key: config[key] for key in STATION_PROFILE_CONFIG_KEYS if key in config}
+            cumulative_distances = config.get("cumulative_distances", {})
+            tasks = [
+                (
+                    dict(
+                        shared,
+                        profile_data={sid: profile_data[sid] for sid in chunk},
+                        cumulative_distances={
+                            sid: cumulative_distances[sid] for sid in chunk if sid in cumulative_distances
+                        },
+                    ),
+                    chunk,
+                    axis_config,
+                    include_bottle_types,
+                )
+                for chunk in chunks
+            ]
+            with ProcessPoolExecutor(max_workers=len(tasks)) as executor:
+                list(executor.map(_station_profiles_worker, tasks))
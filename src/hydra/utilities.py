@@ -1,58 +1,461 @@
 # src/hydra/utilities.py
 
-from geopy.distance import geodesic, great_circle
-from haversine import haversine
+import copy
+import json
+import logging
+import math
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Mean Earth radius in kilometers (same value used by the haversine package)
+EARTH_RADIUS_KM = 6371.0088
+
+# Earth radius in kilometers used by geopy's great_circle
+GREAT_CIRCLE_RADIUS_KM = 6371.009
+
+# WGS84 ellipsoid parameters (meters), shared with the compiled kernels in hydra._kernels
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+
+# Largest bottle number selected through a lookup table instead of hashing
+MAX_BOTTLE_LUT = 1 << 16
+
+# Haversine tracks shorter than this are summed with math in plain Python,
+# which is cheaper than setting up NumPy arrays for a few points
+SMALL_TRACK_MAX_POINTS = 32
+
+# Tracks with at least this many points use the compiled haversine kernel when Numba is available
+NUMBA_HAVERSINE_MIN_POINTS = 1024
+
+# Tracks with at least this many points split the haversine segments over threads
+NUMBA_PARALLEL_MIN_POINTS = 100_000
+
+
+def scan_files(data_dir, extension):
+    """
+    List the regular files in a directory that end with the given extension.
+
+    Uses os.scandir, whose entries cache the file type from the directory read,
+    so no extra stat call is needed per file.
+
+    :param data_dir: Directory to scan.
+    :param extension: Filename suffix to match (e.g. '.csv').
+    :return: List of os.DirEntry objects sorted by filename.
+    """
+    with os.scandir(data_dir) as it:
+        entries = [
+            entry
+            for entry in it
+            if entry.name.endswith(extension) and entry.is_file()
+        ]
+    return sorted(entries, key=lambda entry: entry.name)
+
+
+@lru_cache(maxsize=32)
+def _parse_json_file(path, mtime_ns):
+    """
+    Parse a JSON file; cached on (path, mtime_ns) so edits to the file are picked up.
+    """
+    with open(path, "rb") as f:
+        raw = f.read()
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def load_json_file(path):
+    """
+    Load a JSON file, re-parsing it only when its modification time changes.
+
+    Uses orjson when it is installed, otherwise the standard library json module.
+
+    :param path: Path to the JSON file.
+    :return: Parsed JSON content (a fresh copy, safe to modify).
+    """
+    path = os.path.abspath(path)
+    return copy.deepcopy(_parse_json_file(path, os.stat(path).st_mtime_ns))
+
+
+def _as_numeric_array(values, name):
+    """
+    Convert coordinate values to a NumPy array, raising TypeError on non-numeric entries.
+    """
+    arr = np.asarray(values)
+    if arr.dtype.kind not in "biuf":
+        # Report the first offending value
+        for value in values:
+            if not isinstance(value, (int, float, np.number)):
+                raise TypeError(f"{name} values must be numeric. Invalid value: {value}")
+        arr = arr.astype(np.float64)
+    return arr
 
 
 def validate_coordinates(latitudes, longitudes):
     """
     Validate that latitude and longitude values are within valid ranges and lists are of equal length.
 
-    :param latitudes: List or array of latitudes.
-    :param longitudes: List or array of longitudes.
+    :param latitudes: List or NumPy array of latitudes.
+    :param longitudes: List or NumPy array of longitudes.
     :return: None. Raises ValueError or TypeError if invalid values are found.
     """
     if len(latitudes) != len(longitudes):
         raise ValueError("Latitude and longitude lists must have the same length.")
 
-    for lat in latitudes:
-        if not isinstance(lat, (int, float)):
-            raise TypeError(f"Latitude values must be numeric. Invalid value: {lat}")
-        if not (-90 <= lat <= 90):
-            raise ValueError("Latitude values must be between -90 and 90 degrees.")
+    lat = _as_numeric_array(latitudes, "Latitude")
+    if not ((lat >= -90) & (lat <= 90)).all():
+        raise ValueError("Latitude values must be between -90 and 90 degrees.")
+
+    lon = _as_numeric_array(longitudes, "Longitude")
+    if not ((lon >= -180) & (lon <= 180)).all():
+        raise ValueError("Longitude values must be between -180 and 180 degrees.")
+
+
+@lru_cache(maxsize=None)
+def _wgs84_geod():
+    """
+    Return a pyproj WGS84 Geod, or None if pyproj is not installed.
+
+    pyproj is imported on first use so callers that never compute geodesic
+    distances do not pay for it.
+    """
+    try:
+        from pyproj import Geod
+    except ImportError:  # pragma: no cover - optional dependency
+        return None
+    return Geod(ellps="WGS84")
+
+
+def _haversine_segments(coords):
+    """
+    Compute haversine distances between consecutive rows of a coordinate array.
+
+    :param coords: Array of shape (N, 2) with (latitude, longitude) in degrees.
+    :return: Array of N - 1 segment distances in kilometers.
+    """
+    lat = np.radians(coords[:, 0])
+    lon = np.radians(coords[:, 1])
+    a = (
+        np.sin(np.diff(lat) / 2) ** 2
+        + np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(np.diff(lon) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def _cumulative_haversine_small(coords):
+    """
+    Cumulative haversine distances of a short track, computed with scalar math.
+
+    :param coords: Sequence of (latitude, longitude) pairs in degrees.
+    :return: List of cumulative distances starting with 0.
+    """
+    cumulative = [0.0]
+    total = 0.0
+    lat1 = lon1 = None
+    for lat, lon in coords:
+        lat2, lon2 = math.radians(lat), math.radians(lon)
+        if lat1 is not None:
+            a = (
+                math.sin((lat2 - lat1) / 2) ** 2
+                + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+            )
+            total += 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+            cumulative.append(total)
+        lat1, lon1 = lat2, lon2
+    return cumulative
+
+
+def _great_circle_segments(coords):
+    """
+    Compute great-circle distances between consecutive rows of a coordinate array.
+
+    Uses the same atan2 form and radius as geopy's great_circle.
+
+    :param coords: Array of shape (N, 2) with (latitude, longitude) in degrees.
+    :return: Array of N - 1 segment distances in kilometers.
+    """
+    lat = np.radians(coords[:, 0])
+    lon = np.radians(coords[:, 1])
+    sin_lat, cos_lat = np.sin(lat), np.cos(lat)
+    dlon = np.diff(lon)
+    cos_dlon = np.cos(dlon)
+    y = np.hypot(
+        cos_lat[1:] * np.sin(dlon),
+        cos_lat[:-1] * sin_lat[1:] - sin_lat[:-1] * cos_lat[1:] * cos_dlon,
+    )
+    x = sin_lat[:-1] * sin_lat[1:] + cos_lat[:-1] * cos_lat[1:] * cos_dlon
+    return GREAT_CIRCLE_RADIUS_KM * np.arctan2(y, x)
+
 
-    for lon in longitudes:
-        if not isinstance(lon, (int, float)):
-            raise TypeError(f"Longitude values must be numeric. Invalid value: {lon}")
-        if not (-180 <= lon <= 180):
-            raise ValueError("Longitude values must be between -180 and 180 degrees.")
+def _ruler_segments(coords):
+    """
+    Compute distances between consecutive rows with the Cheap Ruler approximation.
+
+    Each segment is measured on a flat plane scaled to the WGS84 ellipsoid at the segment's
+    mid-latitude, so only one cosine is evaluated per segment. The error against the geodesic
+    distance stays below 0.1% for segments up to a few hundred kilometers away from the poles,
+    but grows quickly beyond that; use 'geodesic' or 'haversine' for long hops.
+
+    :param coords: Array of shape (N, 2) with (latitude, longitude) in degrees.
+    :return: Array of N - 1 segment distances in kilometers.
+    """
+    e2 = WGS84_F * (2 - WGS84_F)
+    cos_lat = np.cos(np.radians((coords[:-1, 0] + coords[1:, 0]) / 2))
+    w2 = 1 / (1 - e2 * (1 - cos_lat**2))
+    w = np.sqrt(w2)
+    km_per_degree = WGS84_A / 1000.0 * np.pi / 180
+    kx = km_per_degree * w * cos_lat
+    ky = km_per_degree * w * w2 * (1 - e2)
+
+    dlon = (np.diff(coords[:, 1]) + 180) % 360 - 180  # Shortest way across the antimeridian
+    return np.hypot(kx * dlon, ky * np.diff(coords[:, 0]))
 
 
 def calculate_cumulative_distances(coords, method="geodesic"):
     """
     Calculate cumulative distances between consecutive coordinates.
 
-    :param coords: List of (latitude, longitude) tuples.
-    :param method: Distance calculation method ('geodesic', 'great_circle', or 'haversine').
+    :param coords: List of (latitude, longitude) tuples or array of shape (N, 2).
+    :param method: Distance calculation method ('geodesic', 'great_circle', 'haversine', or
+                   'ruler'; the Cheap Ruler approximation for short segments).
     :return: List of cumulative distances starting with 0.
     """
-    if method not in ["geodesic", "great_circle", "haversine"]:
+    if method not in ["geodesic", "great_circle", "haversine", "ruler"]:
         raise ValueError(
-            "Invalid method. Choose 'geodesic', 'great_circle', or 'haversine'."
+            "Invalid method. Choose 'geodesic', 'great_circle', 'haversine', or 'ruler'."
         )
 
-    cumulative = [0]
-    for i in range(1, len(coords)):
-        if method == "geodesic":
-            distance = geodesic(coords[i - 1], coords[i]).kilometers
-        elif method == "great_circle":
-            distance = great_circle(coords[i - 1], coords[i]).kilometers
-        elif method == "haversine":
-            distance = haversine(
-                coords[i - 1], coords[i]
-            )  # Returns distance in kilometers by default
-        cumulative.append(cumulative[-1] + distance)
-    return cumulative
+    # No segments to measure: skip the array setup entirely
+    if len(coords) < 2:
+        return [0.0]
+
+    if method == "haversine" and len(coords) < SMALL_TRACK_MAX_POINTS:
+        return _cumulative_haversine_small(coords)
+
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+
+    # The compiled kernels are only imported once a track is long enough to use them
+    if (
+        method == "haversine"
+        and len(coords) >= NUMBA_HAVERSINE_MIN_POINTS
+        and _compiled_kernels().HAS_NUMBA
+    ):
+        kernels = _compiled_kernels()
+        radians = np.radians(coords)
+        lat = np.ascontiguousarray(radians[:, 0])
+        lon = np.ascontiguousarray(radians[:, 1])
+        if len(coords) < NUMBA_PARALLEL_MIN_POINTS:
+            # One fused loop instead of the temporaries of the NumPy expression
+            return kernels.cumulative_haversine(lat, lon, EARTH_RADIUS_KM).tolist()
+        segments = kernels.haversine_segments_parallel(lat, lon, EARTH_RADIUS_KM)
+    elif method == "haversine":
+        segments = _haversine_segments(coords)
+    elif method == "great_circle":
+        segments = _great_circle_segments(coords)
+    elif method == "ruler":
+        segments = _ruler_segments(coords)
+    elif _wgs84_geod() is not None:
+        # PROJ's geodesic solver (same algorithm as geopy) over the whole track in one call
+        segments = np.asarray(_wgs84_geod().line_lengths(coords[:, 1], coords[:, 0])) / 1000.0
+    elif _compiled_kernels().HAS_NUMBA:
+        from geopy.distance import geodesic  # Imported only when geodesic distances are needed
+
+        radians = np.radians(coords)
+        segments = _compiled_kernels().vincenty_segments(
+            np.ascontiguousarray(radians[:, 0]), np.ascontiguousarray(radians[:, 1])
+        )
+        # Vincenty does not converge for nearly antipodal points: fall back to geopy
+        for i in np.flatnonzero(np.isnan(segments)):
+            segments[i] = geodesic(coords[i], coords[i + 1]).kilometers
+    else:
+        from geopy.distance import geodesic
+
+        segments = np.fromiter(
+            (geodesic(start, end).kilometers for start, end in zip(coords[:-1], coords[1:])),
+            dtype=np.float64,
+            count=max(len(coords) - 1, 0),
+        )
+
+    # Running sum in one pass into a preallocated array
+    cumulative = np.empty(len(segments) + 1)
+    cumulative[0] = 0.0
+    np.cumsum(segments, out=cumulative[1:])
+    return cumulative.tolist()
+
+
+def _compiled_kernels():
+    """
+    Import hydra._kernels on first use, so importing hydra does not pay Numba's import time.
+
+    :return: The hydra._kernels module.
+    """
+    from hydra import _kernels
+
+    return _kernels
+
+
+def pairwise_haversine(coords, other=None):
+    """
+    Calculate haversine distances between every pair of points.
+
+    The cumulative distance along a track is the running sum of the first
+    superdiagonal of pairwise_haversine(track), but calculate_cumulative_distances
+    computes it without building the full matrix.
+
+    :param coords: List of (latitude, longitude) tuples or array of shape (N, 2).
+    :param other: Optional second set of points of shape (M, 2); defaults to coords.
+    :return: Array of shape (N, M) with distances in kilometers.
+    """
+    a = np.radians(np.asarray(coords, dtype=np.float64).reshape(-1, 2))
+    b = a if other is None else np.radians(np.asarray(other, dtype=np.float64).reshape(-1, 2))
+
+    lat_a, lat_b = a[:, 0, None], b[None, :, 0]
+    h = (
+        np.sin((lat_b - lat_a) / 2) ** 2
+        + np.cos(lat_a) * np.cos(lat_b) * np.sin((b[None, :, 1] - a[:, 1, None]) / 2) ** 2
+    )
+    # Rounding can push h slightly above 1 for antipodal points
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(h, 1.0)))
+
+
+class CoordinatePath:
+    """
+    Growing track that keeps its points in radians to measure haversine distances incrementally.
+
+    Latitudes, longitudes and the cosine of the latitudes are stored in three float64 arrays
+    that double in size when full, and the cumulative distances already computed are kept, so
+    each call to cumulative only evaluates the trigonometry of the points added since the last
+    call. The result matches calculate_cumulative_distances(coords, method="haversine").
+    """
+
+    def __init__(self, coords=None, capacity=64):
+        """
+        :param coords: Optional initial (latitude, longitude) tuples or array of shape (N, 2).
+        :param capacity: Number of points allocated up front.
+        """
+        capacity = max(int(capacity), 1)
+        self._lat = np.empty(capacity)
+        self._lon = np.empty(capacity)
+        self._cos_lat = np.empty(capacity)
+        self._cumulative = np.zeros(capacity)
+        self._size = 0
+        self._measured = 1  # Points whose cumulative distance is known; the first is always 0
+        if coords is not None:
+            self.extend(coords)
+
+    def __len__(self):
+        return self._size
+
+    def _reserve(self, size):
+        capacity = len(self._lat)
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        for name in ("_lat", "_lon", "_cos_lat", "_cumulative"):
+            grown = np.zeros(capacity)
+            grown[: self._size] = getattr(self, name)[: self._size]
+            setattr(self, name, grown)
+
+    def add_point(self, lat, lon):
+        """
+        Append one point to the end of the track.
+
+        :param lat: Latitude in degrees.
+        :param lon: Longitude in degrees.
+        """
+        self._reserve(self._size + 1)
+        lat_rad = math.radians(lat)
+        self._lat[self._size] = lat_rad
+        self._lon[self._size] = math.radians(lon)
+        self._cos_lat[self._size] = math.cos(lat_rad)
+        self._size += 1
+
+    def extend(self, coords):
+        """
+        Append several points to the end of the track.
+
+        :param coords: List of (latitude, longitude) tuples or array of shape (N, 2).
+        """
+        radians = np.radians(np.asarray(coords, dtype=np.float64).reshape(-1, 2))
+        start, stop = self._size, self._size + len(radians)
+        self._reserve(stop)
+        self._lat[start:stop] = radians[:, 0]
+        self._lon[start:stop] = radians[:, 1]
+        self._cos_lat[start:stop] = np.cos(radians[:, 0])
+        self._size = stop
+
+    def cumulative(self):
+        """
+        Cumulative haversine distances along the track.
+
+        :return: List of cumulative distances in kilometers starting with 0.
+        """
+        if self._size < 2:
+            return [0.0]
+
+        # Only the segments ending at points added since the previous call are measured
+        start, stop = self._measured - 1, self._size
+        if stop - start > 1:
+            lat, lon, cos_lat = (self._lat[start:stop], self._lon[start:stop],
+                                 self._cos_lat[start:stop])
+            a = (
+                np.sin(np.diff(lat) / 2) ** 2
+                + cos_lat[:-1] * cos_lat[1:] * np.sin(np.diff(lon) / 2) ** 2
+            )
+            segments = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+            np.cumsum(segments, out=self._cumulative[start + 1 : stop])
+            self._cumulative[start + 1 : stop] += self._cumulative[start]
+            self._measured = stop
+        return self._cumulative[: self._size].tolist()
+
+
+def _is_integer_valued(values):
+    """
+    Check that a numeric array holds only integer values (NaN entries excluded).
+    """
+    if values.dtype.kind in "iu":
+        return True
+    if values.dtype.kind != "f":
+        return False
+    finite = values[np.isfinite(values)]
+    return bool(np.array_equal(finite, np.floor(finite)))
+
+
+def bottle_lookup_indices(bottles, bottle_lists):
+    """
+    Map bottle numbers to lookup-table positions for integer bottle numbers.
+
+    Bottles that are NaN, negative or not listed point at a final sentinel slot
+    that is never selected.
+
+    :param bottles: Array of the station's bottle numbers.
+    :param bottle_lists: Dictionary mapping bottle types to lists of bottle numbers.
+    :return: Tuple (indices, table_size), or None if the bottle numbers are not small non-negative integers.
+    """
+    wanted = np.asarray([b for numbers in bottle_lists.values() for b in numbers])
+    if wanted.dtype.kind not in "iuf" or bottles.dtype.kind not in "iuf":
+        return None
+    if not (_is_integer_valued(wanted) and _is_integer_valued(bottles)):
+        return None
+    if wanted.size and (wanted.min() < 0 or wanted.max() > MAX_BOTTLE_LUT):
+        return None
+
+    valid = np.isfinite(bottles) & (bottles >= 0) & (bottles <= MAX_BOTTLE_LUT)
+    top = max(wanted.max() if wanted.size else 0, bottles[valid].max() if valid.any() else 0)
+    size = int(top) + 2
+    indices = np.full(bottles.shape, size - 1, dtype=np.intp)
+    indices[valid] = bottles[valid]
+    return indices, size
 
 
 def assign_bottle_types_to_stations(bottle_data, bottle_type_dict):
@@ -68,15 +471,35 @@ def assign_bottle_types_to_stations(bottle_data, bottle_type_dict):
         types_dict = bottle_type_dict.get(station, {})
         
         if not types_dict:
-            print(f"No bottle type information for station {station}, skipping...")
+            logger.info("No bottle type information for station %s, skipping...", station)
             continue  # Skip this station if no bottle types are available
         
-        # Iterate over the bottle types and assign them based on bottle numbers
+        # Map bottle numbers to types in one pass; later types win for shared bottles
+        bottle_lists = {}
         for bottle_type, bottle_numbers in types_dict.items():
             if bottle_numbers is not None:
-                df.loc[df["Bottle"].isin(bottle_numbers), "Bottle_Type"] = bottle_type
+                bottle_lists[bottle_type] = bottle_numbers
+            else:
+                logger.warning("No bottle numbers found for %s in station %s", bottle_type, station)
+
+        if bottle_lists:
+            lookup = bottle_lookup_indices(df["Bottle"].to_numpy(), bottle_lists)
+            if lookup is not None:
+                # Small integer bottle numbers: gather the types from a table indexed by bottle
+                indices, size = lookup
+                table = np.full(size, np.nan, dtype=object)
+                for bottle_type, bottle_numbers in bottle_lists.items():
+                    table[np.asarray(bottle_numbers, dtype=np.intp)] = bottle_type
+                bottle_types = pd.Series(table[indices], index=df.index)
             else:
-                print(f"Warning: No bottle numbers found for {bottle_type} in station {station}")
+                bottle_types = df["Bottle"].map(
+                    {b: t for t, numbers in bottle_lists.items() for b in numbers}
+                )
+            if "Bottle_Type" in df:
+                # Keep the existing type of bottles not listed for this station
+                bottle_types = bottle_types.where(bottle_types.notna(), df["Bottle_Type"])
+            # A handful of type names: store them as categorical codes instead of object strings
+            df["Bottle_Type"] = bottle_types.astype("category")
 
         bottle_data[station] = df
     
@@ -1,6 +1,7 @@
 # tests/conftest.py
 import os
 
+import matplotlib
 import pandas as pd
 import pytest
 import xarray as xr
@@ -8,11 +9,34 @@ import xarray as xr
 from hydra import load_all_data
 from hydra.config import compute_lat_lon_bounds, config
 
+# Render every test figure off-screen; selected before any test imports pyplot
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402 - must follow the backend selection
+
+plt.ioff()
+
+# Test images are never inspected, so write them with the cheapest PNG compression
+os.environ.setdefault("HYDRA_FAST_PNG", "1")
+
+
+@pytest.fixture(autouse=True)
+def close_figures():
+    """
+    Close any figure a test leaves open, so figures do not accumulate across the session.
+    """
+    yield
+    plt.close("all")
+
 
 @pytest.fixture(scope="session")
 def data_fixture(tmp_path_factory):
     """
     Fixture to create mock data directories and files for testing.
+
+    The fixture is built once per session and shared by every test. Tests should take a
+    shallow copy (data_fixture.copy()) and only reassign keys on it; the DataFrames and the
+    bathymetry Dataset inside are shared and must not be modified in place.
     """
     # Create a temporary directory for the entire test session
     temp_dir = tmp_path_factory.mktemp("data")
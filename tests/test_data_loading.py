@@ -3,12 +3,17 @@
 import os
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 import pytest
+import xarray as xr
 
 from hydra.data_loading import (combine_data, extract_ctd_coordinates,
                                 load_all_data, load_csv_files,
-                                load_netcdf_files)
+                                load_netcdf_file, load_netcdf_files,
+                                load_netcdf_files_with_zoom,
+                                load_parquet_files,
+                                maybe_convert_csvs_to_parquet)
 
 
 def test_load_csv_files_empty(tmp_path):
@@ -81,6 +86,27 @@ def test_load_csv_files_with_files(tmp_path):
     assert df.loc[0, "TimeS_mean"] == 12.0, "TimeS_mean should be correctly loaded."
 
 
+def test_load_csv_files_numeric_dtypes(tmp_path):
+    """
+    Test that integer columns stay int64, float columns float64, and bad values become NaN.
+    """
+    csv_file = tmp_path / "station1_01_btl.csv"
+    csv_file.write_text("CTD_lon,CTD_lat,TimeS_mean,Bottle\n-74.0060,40.7128,12,1\n-74.0050,x,13,2")
+
+    df = load_csv_files(
+        data_dir=str(tmp_path),
+        suffixes_to_remove=["_01_btl"],
+        numeric_columns=["CTD_lon", "CTD_lat", "TimeS_mean", "Bottle"],
+    )["station1"]
+    assert df.dtypes.to_dict() == {
+        "CTD_lon": "float64",
+        "CTD_lat": "float64",
+        "TimeS_mean": "int64",
+        "Bottle": "int64",
+    }
+    assert np.isnan(df.loc[1, "CTD_lat"])
+
+
 def test_load_csv_files_missing_required_columns(tmp_path):
     """
     Test loading CSV files that are missing required columns.
@@ -115,6 +141,23 @@ def test_load_csv_files_missing_required_columns(tmp_path):
         )
 
 
+def test_load_csv_files_validates_header_before_parsing(tmp_path):
+    """
+    Test that missing required columns are reported from the header, before the body is parsed.
+    """
+    csv_file = tmp_path / "station2_02_btl.csv"
+    # The body is malformed, so a full parse would fail with a parser error
+    csv_file.write_text("CTD_lon,CTD_lat\n-0.1278,51.5074,1,2,3\n")
+
+    with pytest.raises(KeyError, match="Missing columns \\['Bottle'\\]"):
+        load_csv_files(
+            data_dir=str(tmp_path),
+            suffixes_to_remove=["_01_btl", "_02_btl"],
+            numeric_columns=["CTD_lon", "CTD_lat"],
+            required_columns=["CTD_lon", "CTD_lat", "Bottle"],
+        )
+
+
 def test_load_csv_files_non_csv_files(tmp_path):
     """
     Test that non-CSV files are ignored when loading data.
@@ -152,13 +195,151 @@ def test_load_csv_files_non_csv_files(tmp_path):
     assert "readme" not in data_dict, "Non-CSV files should be ignored."
 
 
+def test_load_csv_files_multiple_workers(tmp_path):
+    """
+    Test that loading with several worker threads returns every station.
+    """
+    csv_content = "CTD_lon,CTD_lat,LONGITUDE,LATITUDE,TimeS_mean,Bottle\n-0.1278,51.5074,-0.1278,51.5074,14.0,1"
+    for station in ["station1", "station2", "station3"]:
+        (tmp_path / f"{station}_01_btl.csv").write_text(csv_content)
+
+    data_dict = load_csv_files(
+        data_dir=str(tmp_path),
+        suffixes_to_remove=["_01_btl", "_02_btl"],
+        numeric_columns=["CTD_lon", "CTD_lat", "TimeS_mean", "Bottle"],
+        required_columns=["CTD_lon", "CTD_lat", "TimeS_mean", "Bottle"],
+        max_workers=2,
+    )
+    assert sorted(data_dict) == [
+        "station1",
+        "station2",
+        "station3",
+    ], "All CSV files should be loaded when using multiple workers."
+
+
+def test_load_csv_files_usecols(tmp_path):
+    """
+    Test that usecols restricts the parsed columns while keeping required ones.
+    """
+    csv_file = tmp_path / "station1_01_btl.csv"
+    csv_content = "CTD_lon,CTD_lat,LONGITUDE,LATITUDE,TimeS_mean,Bottle\n-74.0060,40.7128,-74.0060,40.7128,12.0,1"
+    csv_file.write_text(csv_content)
+
+    data_dict = load_csv_files(
+        data_dir=str(tmp_path),
+        suffixes_to_remove=["_01_btl", "_02_btl"],
+        numeric_columns=["CTD_lon", "CTD_lat"],
+        required_columns=["Bottle"],
+        usecols=["TimeS_mean"],
+    )
+    assert sorted(data_dict["station1"].columns) == [
+        "Bottle",
+        "CTD_lat",
+        "CTD_lon",
+        "TimeS_mean",
+    ], "Only requested, required and numeric columns should be loaded."
+
+
+def test_load_csv_files_chunksize(tmp_path):
+    """
+    Test that chunked reads give the same DataFrame and still validate required columns.
+    """
+    csv_content = (
+        "CTD_lon,CTD_lat,TimeS_mean,Bottle\n"
+        "-74.0060,40.7128,12.0,1\n-74.0050,40.7138,13.0,2\n-74.0040,40.7148,n/a,3"
+    )
+    (tmp_path / "station1_01_btl.csv").write_text(csv_content)
+    kwargs = dict(
+        data_dir=str(tmp_path),
+        suffixes_to_remove=["_01_btl", "_02_btl"],
+        numeric_columns=["CTD_lon", "CTD_lat", "TimeS_mean", "Bottle"],
+        required_columns=["CTD_lon", "CTD_lat", "TimeS_mean", "Bottle"],
+    )
+
+    expected = load_csv_files(**kwargs)["station1"]
+    chunked = load_csv_files(chunksize=1, **kwargs)["station1"]
+    pd.testing.assert_frame_equal(chunked, expected)
+
+    with pytest.raises(KeyError, match="Missing columns"):
+        load_csv_files(
+            chunksize=1,
+            **{**kwargs, "required_columns": ["CTD_lon", "CTD_depth"]},
+        )
+
+
+def test_load_csv_files_pyarrow_backend(tmp_path):
+    """
+    Test that dtype_backend='pyarrow' returns Arrow-backed columns.
+    """
+    pytest.importorskip("pyarrow")
+    csv_file = tmp_path / "station1_01_btl.csv"
+    csv_file.write_text("CTD_lon,CTD_lat,Bottle,Notes\n-74.0060,40.7128,1,surface")
+
+    df = load_csv_files(
+        data_dir=str(tmp_path),
+        suffixes_to_remove=["_01_btl", "_02_btl"],
+        numeric_columns=["CTD_lon", "CTD_lat", "Bottle"],
+        required_columns=["CTD_lon", "CTD_lat", "Bottle"],
+        dtype_backend="pyarrow",
+    )["station1"]
+    assert all(isinstance(dtype, pd.ArrowDtype) for dtype in df.dtypes)
+    assert df.loc[0, "CTD_lon"] == -74.0060
+
+
+def test_load_csv_files_engine(tmp_path):
+    """
+    Test that the C parser is the default and the PyArrow parser is opt-in.
+    """
+    pytest.importorskip("pyarrow")
+    csv_file = tmp_path / "station1_01_btl.csv"
+    csv_file.write_text("CTD_lon,CTD_lat,Date\n-74.0060,40.7128,2024-05-01\n")
+    kwargs = dict(
+        data_dir=str(tmp_path),
+        suffixes_to_remove=["_01_btl"],
+        numeric_columns=["CTD_lon", "CTD_lat"],
+    )
+
+    default = load_csv_files(**kwargs)["station1"]
+    assert not pd.api.types.is_datetime64_any_dtype(default["Date"])
+    assert default.loc[0, "Date"] == "2024-05-01"
+
+    arrow = load_csv_files(**kwargs, engine="pyarrow")["station1"]
+    pd.testing.assert_frame_equal(arrow[["CTD_lon", "CTD_lat"]], default[["CTD_lon", "CTD_lat"]])
+
+
+def test_load_parquet_files_from_converted_csvs(tmp_path):
+    """
+    Test that CSVs converted to Parquet load back as the same DataFrames.
+    """
+    pytest.importorskip("pyarrow")
+    csv_file = tmp_path / "station1_01_btl.csv"
+    csv_file.write_text("CTD_lon,CTD_lat,Bottle\n-74.0060,40.7128,1\n-74.0050,40.7138,2")
+    kwargs = dict(
+        suffixes_to_remove=["_01_btl", "_02_btl"],
+        required_columns=["CTD_lon", "CTD_lat", "Bottle"],
+    )
+    numeric_columns = ["CTD_lon", "CTD_lat", "Bottle"]
+
+    written = maybe_convert_csvs_to_parquet(str(tmp_path), numeric_columns)
+    assert written == [str(tmp_path / "station1_01_btl.parquet")]
+    assert maybe_convert_csvs_to_parquet(str(tmp_path), numeric_columns) == []
+
+    expected = load_csv_files(str(tmp_path), numeric_columns=numeric_columns, **kwargs)
+    loaded = load_parquet_files(str(tmp_path), **kwargs)
+    pd.testing.assert_frame_equal(loaded["station1"], expected["station1"])
+
+    with pytest.raises(KeyError, match="Missing columns \\['CTD_depth'\\]"):
+        load_parquet_files(
+            str(tmp_path), suffixes_to_remove=[], required_columns=["CTD_depth"]
+        )
+
+
 def test_load_netcdf_files_with_valid_data(tmp_path):
     """
     Test loading NetCDF files with valid variables.
     """
     # Create mock NetCDF file
     bathymetry_file = tmp_path / "bathymetry.nc"
-    import xarray as xr
 
     ds = xr.Dataset(
         {"depth": (("lat", "lon"), [[1000, 2000], [1500, 2500]])},
@@ -176,13 +357,52 @@ def test_load_netcdf_files_with_valid_data(tmp_path):
     ), "'depth' variable should be present in the loaded NetCDF dataset."
 
 
+def test_load_netcdf_files_with_zoom_decodes_region(tmp_path):
+    """
+    Test that packed variables are masked and scaled after zooming into a region.
+    """
+    ds = xr.Dataset(
+        {"depth": (("lat", "lon"), [[1000.0, 2000.0], [np.nan, 2500.0]])},
+        coords={"lat": [0, 1], "lon": [0, 1]},
+    )
+    encoding = {"depth": {"dtype": "int16", "scale_factor": 0.5, "_FillValue": -1}}
+    ds.to_netcdf(str(tmp_path / "bathymetry.nc"), encoding=encoding)
+
+    data_dict = load_netcdf_files_with_zoom(
+        data_dir=str(tmp_path),
+        variable_names=["depth"],
+        lat_range=(1, 1),
+        lon_range=(0, 1),
+    )
+    depth = data_dict["bathymetry.nc"]["depth"].values
+    np.testing.assert_array_equal(depth, [[np.nan, 2500.0]])
+
+
+def test_load_netcdf_file_zoom(tmp_path):
+    """
+    Test loading a single NetCDF file with a zoomed region.
+    """
+    bathymetry_file = tmp_path / "bathymetry.nc"
+    xr.Dataset(
+        {"depth": (("lat", "lon"), [[1000, 2000], [1500, 2500]])},
+        coords={"lat": [0, 1], "lon": [0, 1]},
+    ).to_netcdf(str(bathymetry_file))
+
+    ds = load_netcdf_file(
+        str(bathymetry_file), ["depth"], lat_range=(0, 0), lon_range=(0, 1)
+    )
+    assert ds["depth"].values.tolist() == [[1000, 2000]]
+
+    with pytest.raises(KeyError, match="Missing variables .* in NetCDF file bathymetry.nc"):
+        load_netcdf_file(str(bathymetry_file), ["elevation"])
+
+
 def test_load_netcdf_files_missing_variables(tmp_path):
     """
     Test loading NetCDF files that are missing required variables.
     """
     # Create mock NetCDF file missing 'depth' variable
     bathymetry_file = tmp_path / "bathymetry_missing.nc"
-    import xarray as xr
 
     ds = xr.Dataset(
         {"elevation": (("lat", "lon"), [[500, 1000], [750, 1250]])},
@@ -196,21 +416,140 @@ def test_load_netcdf_files_missing_variables(tmp_path):
         load_netcdf_files(data_dir=str(tmp_path), variable_names=["depth"])
 
 
+def _write_station_files(tmp_path):
+    """
+    Write one bottle and one profile CSV and return their directories.
+    """
+    bottle_dir = tmp_path / "bottle_data"
+    profile_dir = tmp_path / "profile_data"
+    bottle_dir.mkdir()
+    profile_dir.mkdir()
+    (bottle_dir / "station1_01_btl.csv").write_text(
+        "CTD_lon,CTD_lat,TimeS_mean,Bottle\n0.1,0.1,12.0,1\n0.2,0.2,13.0,2"
+    )
+    (profile_dir / "station1_01_cnv.csv").write_text(
+        "Dship_lon,Dship_lat,CTD_lon,CTD_lat,timeS,upoly0,CTD_depth\n"
+        "0.1,0.1,0.1,0.1,12,0.1,100\n0.2,0.2,0.2,0.2,13,0.2,150"
+    )
+    return bottle_dir, profile_dir
+
+
+def test_load_all_data_opens_only_bathymetry_file(tmp_path):
+    """
+    Test that load_all_data opens the given bathymetry file without scanning its directory.
+    """
+    bottle_dir, profile_dir = _write_station_files(tmp_path)
+    bathymetry_dir = tmp_path / "bathymetry"
+    bathymetry_dir.mkdir()
+    xr.Dataset(
+        {"elevation": (("lat", "lon"), [[-1000, -2000], [-1500, -2500]])},
+        coords={"lat": [0, 1], "lon": [0, 1]},
+    ).to_netcdf(str(bathymetry_dir / "bathymetry.nc"))
+    # An unrelated file without the variable must not cause a failure
+    xr.Dataset(
+        {"other": (("lat", "lon"), [[0, 0], [0, 0]])},
+        coords={"lat": [0, 1], "lon": [0, 1]},
+    ).to_netcdf(str(bathymetry_dir / "other.nc"))
+
+    data = load_all_data(
+        bottle_data_dir=str(bottle_dir),
+        profile_data_dir=str(profile_dir),
+        bathymetry_file=str(bathymetry_dir / "bathymetry.nc"),
+        bottle_type_dict={"station1": {"DNA": [1]}},
+        calculate_distances=True,
+    )
+    assert "elevation" in data["bathymetry"].variables
+    assert len(data["cumulative_distances"]["station1"]) == 2
+    assert list(data["profile_data"]) == ["station1"]
+
+
+def test_load_all_data_ctd_coordinates_per_station(tmp_path):
+    """
+    Test that CTD coordinates are split back into the right station arrays.
+    """
+    bottle_dir, profile_dir = _write_station_files(tmp_path)
+    (bottle_dir / "station2_01_btl.csv").write_text(
+        "CTD_lon,CTD_lat,TimeS_mean,Bottle\n0.5,0.6,12.0,1"
+    )
+    xr.Dataset(
+        {"elevation": (("lat", "lon"), [[-1000, -2000], [-1500, -2500]])},
+        coords={"lat": [0, 1], "lon": [0, 1]},
+    ).to_netcdf(str(tmp_path / "bathymetry.nc"))
+
+    data = load_all_data(
+        bottle_data_dir=str(bottle_dir),
+        profile_data_dir=str(profile_dir),
+        bathymetry_file=str(tmp_path / "bathymetry.nc"),
+        bottle_type_dict={},
+    )
+    coordinates = data["ctd_coordinates"]
+    assert coordinates["station1"].tolist() == [[0.1, 0.1], [0.2, 0.2]]
+    assert coordinates["station2"].tolist() == [[0.6, 0.5]]
+
+    # Distances do not require the coordinates to be returned
+    data = load_all_data(
+        bottle_data_dir=str(bottle_dir),
+        profile_data_dir=str(profile_dir),
+        bathymetry_file=str(tmp_path / "bathymetry.nc"),
+        bottle_type_dict={},
+        extract_coordinates=False,
+        calculate_distances=True,
+    )
+    assert "ctd_coordinates" not in data
+    assert data["cumulative_distances"]["station2"] == [0.0]
+
+
+def test_load_all_data_profile_errors_propagate(tmp_path):
+    """
+    Test that errors raised while loading profiles in the background reach the caller.
+    """
+    bottle_dir, profile_dir = _write_station_files(tmp_path)
+    (profile_dir / "station2_01_cnv.csv").write_text("CTD_lon,CTD_lat\n0.1,0.1")
+    xr.Dataset(
+        {"elevation": (("lat", "lon"), [[-1000, -2000], [-1500, -2500]])},
+        coords={"lat": [0, 1], "lon": [0, 1]},
+    ).to_netcdf(str(tmp_path / "bathymetry.nc"))
+
+    with pytest.raises(KeyError, match="Missing columns"):
+        load_all_data(
+            bottle_data_dir=str(bottle_dir),
+            profile_data_dir=str(profile_dir),
+            bathymetry_file=str(tmp_path / "bathymetry.nc"),
+            bottle_type_dict={},
+        )
+
+
+def test_load_all_data_missing_bathymetry_file(tmp_path):
+    """
+    Test that load_all_data raises FileNotFoundError for a missing bathymetry file.
+    """
+    bottle_dir, profile_dir = _write_station_files(tmp_path)
+
+    with pytest.raises(FileNotFoundError, match="Bathymetry file missing.nc not found"):
+        load_all_data(
+            bottle_data_dir=str(bottle_dir),
+            profile_data_dir=str(profile_dir),
+            bathymetry_file=str(tmp_path / "missing.nc"),
+            bottle_type_dict={},
+        )
+
+
 def test_extract_ctd_coordinates():
     """
     Test extracting CTD coordinates from a DataFrame.
     """
     df = pd.DataFrame({"CTD_lat": [40.7128, 51.5074], "CTD_lon": [-74.0060, -0.1278]})
     coords = extract_ctd_coordinates(df, lat_column="CTD_lat", lon_column="CTD_lon")
-    expected = [(40.7128, -74.0060), (51.5074, -0.1278)]
+    expected = [[40.7128, -74.0060], [51.5074, -0.1278]]
+    assert coords.shape == (2, 2), "CTD coordinates should be an (N, 2) array."
     assert (
-        coords == expected
-    ), "CTD coordinates should be correctly extracted as (lat, lon) tuples."
+        coords.tolist() == expected
+    ), "CTD coordinates should be correctly extracted as (lat, lon) rows."
 
 
 def test_combine_data_type_error():
     """
-    Test that combine_data raises an AttributeError when data_dict is not a dictionary.
+    Test that combine_data raises a TypeError when data_dict is not a dictionary.
     """
     data_dict = [
         pd.DataFrame(
@@ -225,5 +564,5 @@ def test_combine_data_type_error():
         )
     ]
 
-    with pytest.raises(AttributeError, match="'list' object has no attribute 'items'"):
+    with pytest.raises(TypeError, match="data_dict must be a dictionary"):
         combine_data(data_dict=data_dict, station_id_column="Station_ID")
@@ -1,9 +1,12 @@
 # tests/test_data_processing.py
 
+import numpy as np
 import pandas as pd
 import pytest
 
-from hydra.data_processing import combine_data, filter_data_by_temperature
+from hydra.data_processing import (combine_data,
+                                   extract_dna_samples_from_bottle_data,
+                                   filter_data_by_temperature)
 
 
 def test_combine_data_empty():
@@ -47,7 +50,8 @@ def test_combine_data_single_station():
         }
     )
 
-    pd.testing.assert_frame_equal(combined.reset_index(drop=True), expected)
+    # combine_data returns a fresh RangeIndex, so no reset_index is needed
+    pd.testing.assert_frame_equal(combined, expected, check_exact=True)
 
 
 def test_combine_data_multiple_stations():
@@ -90,7 +94,40 @@ def test_combine_data_multiple_stations():
         }
     )
 
-    pd.testing.assert_frame_equal(combined.reset_index(drop=True), expected)
+    # combine_data returns a fresh RangeIndex, so no reset_index is needed
+    pd.testing.assert_frame_equal(combined, expected, check_exact=True)
+
+
+def test_combine_data_categorical_station_id():
+    """
+    Test that station identifiers can be stored as a categorical column.
+    """
+    data_dict = {
+        "Station1": pd.DataFrame({"CTD_lat": [40.7, 40.8]}),
+        "Station2": pd.DataFrame({"CTD_lat": [51.5]}),
+    }
+    combined = combine_data(
+        data_dict, station_id_column="Station_ID", categorical_station_id=True
+    )
+    assert isinstance(combined["Station_ID"].dtype, pd.CategoricalDtype)
+    assert list(combined["Station_ID"].cat.categories) == ["Station1", "Station2"]
+    assert combined["Station_ID"].tolist() == ["Station1", "Station1", "Station2"]
+
+
+def test_combine_data_mixed_station_id_types():
+    """
+    Test that mixed int and str station keys keep their types in the identifier column.
+    """
+    data_dict = {
+        1: pd.DataFrame({"CTD_lat": [40.7, 40.8]}),
+        "S2": pd.DataFrame({"CTD_lat": [51.5]}),
+    }
+    combined = combine_data(data_dict, station_id_column="Station_ID")
+    assert combined["Station_ID"].tolist() == [1, 1, "S2"]
+    assert (combined["Station_ID"] == 1).tolist() == [True, True, False]
+
+    numeric = combine_data({1: data_dict[1], 2: data_dict["S2"]}, station_id_column="Station_ID")
+    assert numeric["Station_ID"].dtype == np.int64
 
 
 def test_filter_data_by_temperature():
@@ -128,7 +165,7 @@ def test_filter_data_by_temperature():
         }
     )
 
-    pd.testing.assert_frame_equal(filtered.reset_index(drop=True), expected)
+    pd.testing.assert_frame_equal(filtered.reset_index(drop=True), expected, check_exact=True)
 
 
 def test_filter_data_by_temperature_no_matches():
@@ -176,3 +213,32 @@ def test_filter_data_by_temperature_invalid_column():
 
     with pytest.raises(KeyError):
         filter_data_by_temperature(df, min_temp=20, temperature_column="temperature")
+
+
+def test_extract_dna_samples_from_bottle_data():
+    """
+    Test extracting DNA sample positions for the configured bottles only.
+    """
+    config = {
+        "bottle_data": {
+            "Station1": pd.DataFrame(
+                {
+                    "Bottle": [1.0, 2.0, 3.0],
+                    "CTD_lon": [-74.0, -74.1, -74.2],
+                    "CTD_lat": [40.7, 40.8, 40.9],
+                }
+            ),
+        },
+        "dna_samples": {"Station1": [1, 3], "Station2": [1]},
+    }
+    samples = extract_dna_samples_from_bottle_data(config)
+    assert samples == [
+        {"station_id": "Station1", "bottle": 1.0, "lon": -74.0, "lat": 40.7},
+        {"station_id": "Station1", "bottle": 3.0, "lon": -74.2, "lat": 40.9},
+    ]
+
+    arrays = extract_dna_samples_from_bottle_data(config, as_arrays=True)
+    assert arrays["station_id"].tolist() == ["Station1", "Station1"]
+    np.testing.assert_array_equal(arrays["bottle"], [1.0, 3.0])
+    np.testing.assert_array_equal(arrays["lon"], [-74.0, -74.2])
+    np.testing.assert_array_equal(arrays["lat"], [40.7, 40.9])
@@ -4,12 +4,21 @@ import os
 from pathlib import Path
 
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 import pytest  # Make sure pytest is imported
 import xarray as xr
+from matplotlib.collections import QuadMesh
+from matplotlib.image import AxesImage
 
-from hydra.plotting import \
-    generalized_map_plot  # Ensure the import paths are correct
+import hydra.plotting as plotting
+from hydra.plotting import (  # Ensure the import paths are correct
+    BathymetryArrays, _bathymetry_colors, _bathymetry_grid, _bottle_type_positions,
+    _coordinate_bounds, _crop_grid, _draw_bathymetry, _draw_map_background,
+    _draw_profiles, _draw_stations, _save_figure, _station_arrays,
+    _station_bottle_positions, _subsample_grid, _unique_handles,
+    generalized_map_plot, generalized_profile_plot)
+from hydra.utilities import bottle_lookup_indices
 
 
 def test_generalized_map_plot_with_valid_data(data_fixture, tmp_path):
@@ -93,3 +102,409 @@ def test_generalized_map_plot_error_handling():
         )
     except Exception as e:
         pytest.fail(f"Plotting failed with error: {e}")
+
+
+def test_bottle_type_positions():
+    """
+    Test that bottle rows are split by type in plotting order, including shared bottles.
+    """
+    df = pd.DataFrame({"Bottle": [1.0, 2.0, 3.0, 4.0], "CTD_depth": [10, 20, 30, 40]})
+
+    groups = _bottle_type_positions(df, {"DNA": [3, 1], "Hydrogen": [2]}, ["Hydrogen", "DNA", "Other"])
+    assert [(bt, p.tolist()) for bt, p in groups] == [("Hydrogen", [1]), ("DNA", [0, 2])]
+
+    shared = _bottle_type_positions(df, {"DNA": [1, 2], "Hydrogen": [2]}, ["DNA", "Hydrogen"])
+    assert [(bt, p.tolist()) for bt, p in shared] == [("DNA", [0, 1]), ("Hydrogen", [1])]
+
+
+def test_crop_grid_handles_ascending_and_descending_axes():
+    """
+    Test that the bathymetry grid is cropped to the bounds plus one cell, for either axis order.
+    """
+    lon = np.arange(0.0, 10.0)
+    lat = np.arange(20.0, 10.0, -1.0)
+    depths = np.arange(100.0).reshape(10, 10)
+
+    cropped_lon, cropped_lat, cropped_depths = _crop_grid(lon, lat, depths, (3.5, 5.5, 14.5, 16.5), margin=0)
+    assert cropped_lon.tolist() == [3.0, 4.0, 5.0, 6.0]
+    assert cropped_lat.tolist() == [17.0, 16.0, 15.0, 14.0]
+    assert cropped_depths.shape == (4, 4)
+    assert cropped_depths[0, 0] == depths[3, 3]
+
+    # Bounds outside the grid keep the full grid
+    full = _crop_grid(lon, lat, depths, (50.0, 60.0, 14.5, 16.5))
+    assert full[0] is lon and full[2] is depths
+
+
+def test_draw_stations_uses_one_collection_per_axes():
+    """
+    Test that station paths and bottles are drawn as two artists, with legend handles per station and type.
+    """
+    config = {
+        "profile_data": {
+            "S1": pd.DataFrame({"CTD_lon": [0.0, 0.1], "CTD_lat": [1.0, 1.1], "Bottle": [1.0, 2.0]}),
+            "S2": pd.DataFrame({"CTD_lon": [0.2, 0.3, 0.4], "CTD_lat": [1.2, 1.3, 1.4], "Bottle": [1.0, 2.0, 3.0]}),
+        },
+        "bottle_type_dict": {"S1": {"DNA": [1]}, "S2": {"DNA": [1], "H2": [2, 3]}},
+    }
+
+    colors = np.array([(1.0, 0.0, 0.0, 1.0), (0.0, 0.0, 1.0, 1.0)])
+    index = {"S1": 0, "S2": 1}
+
+    fig, ax = plt.subplots()
+    artists, handles = _draw_stations(ax, config, ["S1", "S2", "missing"], colors, index, ["DNA", "H2"])
+
+    assert len(artists) == 2
+    assert [h.get_label() for h in handles] == ["Station S1", "DNA", "Station S2", "DNA", "H2"]
+
+    assert [h.get_label() for h in _unique_handles(handles)] == ["Station S1", "DNA", "Station S2", "H2"]
+    assert len(artists[0].get_segments()) == 2
+    assert artists[1].get_offsets().shape == (4, 2)
+    fig.canvas.draw()  # Bottle colors are mapped from station codes at draw time
+    assert artists[1].get_facecolors()[:, 2].tolist() == [0.0, 1.0, 1.0, 1.0]
+    plt.close(fig)
+
+
+def test_bottle_type_positions_lookup_and_fallback():
+    """
+    Test that integer bottles with NaN use the lookup table, and non-integer bottles fall back to isin.
+    """
+    df = pd.DataFrame({"Bottle": [1.0, None, 3.0, -2.0, 1e9], "CTD_depth": [10, 20, 30, 40, 50]})
+    assert bottle_lookup_indices(df["Bottle"].to_numpy(), {"DNA": [1, 3]}) is not None
+    groups = _bottle_type_positions(df, {"DNA": [1, 3]}, ["DNA"])
+    assert [(bt, p.tolist()) for bt, p in groups] == [("DNA", [0, 2])]
+
+    labels = pd.DataFrame({"Bottle": [1.5, 2.0, 3.5], "CTD_depth": [10, 20, 30]})
+    assert bottle_lookup_indices(labels["Bottle"].to_numpy(), {"DNA": [1.5]}) is None
+    groups = _bottle_type_positions(labels, {"DNA": [1.5, 3.5]}, ["DNA"])
+    assert [(bt, p.tolist()) for bt, p in groups] == [("DNA", [0, 2])]
+
+
+def test_station_arrays_cache_and_bounds():
+    """
+    Test that station arrays are reused within one station_cache, that calls without it see
+    in-place edits, and that bounds skip NaN coordinates.
+    """
+    df = pd.DataFrame({"CTD_lon": [0.0, np.nan, 2.0], "CTD_lat": [1.0, 3.0, np.nan]})
+    config = {"profile_data": {"S1": df, "S2": None}}
+    station_cache = {}
+
+    arrays = _station_arrays(config, "S1", station_cache)
+    assert _station_arrays(config, "S1", station_cache) is arrays
+    assert set(arrays) == {"CTD_lon", "CTD_lat"}
+    assert arrays["CTD_lon"].dtype == np.float32
+    assert _coordinate_bounds(config, ["S1", "S2"], station_cache) == (0.0, 2.0, 1.0, 3.0)
+    assert set(config) == {"profile_data"}
+
+    # Without a shared station_cache every call reads the DataFrame as it is now
+    df["CTD_lon"] = df["CTD_lon"] + 10
+    df.loc[0, "CTD_lat"] = 50.0
+    assert _coordinate_bounds(config, ["S1"]) == (10.0, 12.0, 3.0, 50.0)
+    assert _coordinate_bounds(config, ["S2"]) is None
+
+
+@pytest.mark.parametrize("max_workers", [None, 2])
+def test_generalized_map_plot_per_station_maps(tmp_path, max_workers):
+    """
+    Test that per-station maps are saved both serially and from worker processes.
+    """
+    profile = pd.DataFrame(
+        {"CTD_lon": [0.1, 0.2], "CTD_lat": [1.1, 1.2], "Bottle": [1.0, 2.0]}
+    )
+    config = {
+        "stations": {"included": ["S1", "S2", "S3"]},
+        "profile_data": {"S1": profile, "S2": profile.copy(), "S3": None},
+        "bottle_type_dict": {"S1": {"DNA": [1]}},
+        "bathymetry": xr.Dataset(
+            {"elevation": (("lat", "lon"), np.random.rand(5, 6))},
+            coords={"lat": np.linspace(1.0, 1.4, 5), "lon": np.linspace(0.0, 0.5, 6)},
+        ),
+        "vents": {"V1": {"coordinates": [1.15, 0.15], "name": "Vent 1"}},
+        "output_paths": {"subplot": str(tmp_path)},
+        "plot_settings": {"dpi": 20},
+    }
+
+    generalized_map_plot(config, create_subplots=True, subplot_groups=[], max_workers=max_workers)
+
+    assert sorted(os.listdir(tmp_path)) == ["map_plot_S1.png", "map_plot_S2.png", "map_plot_S3.png"]
+
+
+def test_per_station_maps_keep_bathymetry_resolution(tmp_path, monkeypatch):
+    """
+    Test that a zoomed per-station map shows the bathymetry cells at the grid's own resolution.
+    """
+    lon = np.linspace(0.0, 10.0, 2001)  # 0.005 degree cells, far more than the axis' pixels
+    lat = np.linspace(4.5, 5.5, 201)
+    config = {
+        "stations": {"included": ["S1"]},
+        "profile_data": {"S1": pd.DataFrame({"CTD_lon": [5.0, 5.02], "CTD_lat": [5.0, 5.02]})},
+        "bathymetry": xr.Dataset(
+            {"elevation": (("lat", "lon"), np.random.rand(lat.size, lon.size))},
+            coords={"lat": lat, "lon": lon},
+        ),
+        "output_paths": {"subplot": str(tmp_path)},
+        "plot_settings": {"dpi": 20},
+    }
+    visible_cells = []
+
+    def record_view(fig, path, dpi):
+        ax = fig.axes[0]
+        image = ax.images[0]
+        extent = image.get_extent()
+        cell_width = (extent[1] - extent[0]) / image.get_array().shape[1]
+        xlim = ax.get_xlim()
+        visible_cells.append((xlim[1] - xlim[0]) / cell_width)
+
+    monkeypatch.setattr(plotting, "_save_figure", record_view)
+    generalized_map_plot(config, include_vents=False, create_subplots=True, subplot_groups=[])
+
+    # The view spans 0.04 degrees (0.02 of data plus the 0.01 margins): 8 cells of 0.005
+    assert visible_cells == [pytest.approx(8.0)]
+
+
+def test_generalized_profile_plot_single_group_single_column(tmp_path):
+    """
+    Test that a one-cell subplot grid (one group, one column) is saved.
+    """
+    config = {
+        "profile_data": {
+            "S1": pd.DataFrame({"timeS": [0.0, 1.0], "CTD_depth": [5.0, 10.0], "Bottle": [1.0, 2.0]})
+        },
+        "bottle_type_dict": {"S1": {"DNA": [1, 2]}},
+        "output_paths": {"subplot": str(tmp_path)},
+    }
+
+    generalized_profile_plot(
+        config, include_bottle_types=["DNA"], create_subplots=True, num_cols=1, grouping_list=[["S1"]]
+    )
+
+    assert (tmp_path / "profile_plot_group.png").exists()
+
+
+def test_draw_map_background_plots_vents_once():
+    """
+    Test that all vents are drawn by one scatter with a single legend entry.
+    """
+    config = {
+        "vents": {
+            "V1": {"coordinates": [1.0, 10.0], "name": "Vent 1"},
+            "V2": {"coordinates": [2.0, 20.0], "name": "Vent 2"},
+        }
+    }
+    fig, ax = plt.subplots()
+    vent_artists = _draw_map_background(ax, config, None, True, "pcolormesh", "Map")
+    assert len(vent_artists) == 1
+    assert vent_artists[0].get_offsets().tolist() == [[10.0, 1.0], [20.0, 2.0]]
+    assert [text.get_text() for text in ax.texts] == ["Vent 1", "Vent 2"]
+    assert _draw_map_background(ax, {}, None, True, "pcolormesh", "Map") == []
+    plt.close(fig)
+
+
+def test_draw_bathymetry_auto_mode():
+    """
+    Test that evenly spaced grids are drawn as an image and uneven grids as a mesh.
+    """
+    depths = np.arange(12.0).reshape(3, 4)
+    fig, ax = plt.subplots()
+
+    image = _draw_bathymetry(ax, (np.arange(4.0), np.array([2.0, 1.0, 0.0]), depths))
+    assert isinstance(image, AxesImage)
+    assert image.get_extent() == [-0.5, 3.5, -0.5, 2.5]
+    assert image.get_array()[0, 0] == depths[2, 0]  # Lowest latitude drawn at the bottom
+
+    mesh = _draw_bathymetry(ax, (np.array([0.0, 1.0, 3.0, 7.0]), np.arange(3.0), depths))
+    assert isinstance(mesh, QuadMesh)
+
+    with pytest.raises(ValueError, match="Invalid bathymetry_mode"):
+        _draw_bathymetry(ax, (np.arange(4.0), np.arange(3.0), depths), mode="scatter")
+    plt.close(fig)
+
+
+def test_draw_profiles_matches_bottle_rows():
+    """
+    Test that each profile line pairs the x values and depths of its own bottle rows.
+    """
+    config = {
+        "profile_data": {
+            "S1": pd.DataFrame(
+                {"timeS": [0.0, 1.0, 2.0, 3.0], "CTD_depth": [5.0, 10.0, 15.0, 20.0], "Bottle": [1.0, 2.0, 1.0, 3.0]}
+            ),
+        },
+        "bottle_type_dict": {"S1": {"DNA": [1], "H2": [2, 3]}},
+        "cumulative_distances": {"S1": [0.0, 0.5, 1.0, 1.5]},
+    }
+
+    fig, ax = plt.subplots()
+    handles, xlabel = _draw_profiles(ax, config, ["S1"], "distance", ["DNA", "H2"])
+    assert xlabel == "Distance (km)"
+    assert [h.get_label() for h in handles] == ["S1 - DNA", "S1 - H2"]
+    segments = ax.collections[0].get_segments()
+    np.testing.assert_allclose(segments[0], [[0.0, 5.0], [1.0, 15.0]])
+    np.testing.assert_allclose(segments[1], [[0.5, 10.0], [1.5, 20.0]])
+
+    with pytest.raises(ValueError, match="Cumulative distances not calculated"):
+        _draw_profiles(ax, {"profile_data": config["profile_data"]}, ["S1"], "distance", ["DNA"])
+    plt.close(fig)
+
+
+def test_draw_bathymetry_with_precomputed_colors():
+    """
+    Test that a precomputed RGBA image is cropped and shown, returning the shared mappable.
+    """
+    grid = (np.arange(10.0), np.arange(8.0), np.arange(80.0).reshape(8, 10))
+    colors = _bathymetry_colors(grid)
+    assert colors[0].shape == (8, 10, 4) and colors[0].dtype == np.uint8
+
+    fig, ax = plt.subplots()
+    mappable = _draw_bathymetry(ax, grid, bounds=(2.0, 4.0, 3.0, 5.0), colors=colors)
+    assert mappable is colors[1]
+    assert ax.images[0].get_array().shape == (5, 5, 4)
+    plt.close(fig)
+
+
+def test_station_bottle_positions_are_memoized():
+    """
+    Test that bottle positions are reused within one station_cache until the bottle types change.
+    """
+    config = {
+        "profile_data": {"S1": pd.DataFrame({"Bottle": [1.0, 2.0, 3.0]})},
+        "bottle_type_dict": {"S1": {"DNA": [1, 3]}},
+    }
+    station_cache = {}
+    first = _station_bottle_positions(config, "S1", ["DNA"], station_cache)
+    assert _station_bottle_positions(config, "S1", ["DNA"], station_cache) is first
+    assert [(bt, p.tolist()) for bt, p in first] == [("DNA", [0, 2])]
+
+    config["bottle_type_dict"]["S1"]["DNA"] = [2]
+    positions = _station_bottle_positions(config, "S1", ["DNA"], station_cache)
+    assert [(bt, p.tolist()) for bt, p in positions] == [("DNA", [1])]
+
+    # A new plotting call starts from an empty cache and sees edited bottles
+    config["profile_data"]["S1"].loc[1, "Bottle"] = 3.0
+    positions = _station_bottle_positions(config, "S1", ["DNA"])
+    assert [(bt, p.tolist()) for bt, p in positions] == []
+
+
+@pytest.mark.parametrize("max_workers", [None, 2])
+def test_generalized_profile_plot_separate_stations(tmp_path, max_workers):
+    """
+    Test that plot_all_together=False saves one profile per station with data.
+    """
+    profile = pd.DataFrame(
+        {"timeS": [0.0, 1.0, 2.0], "CTD_depth": [5.0, 10.0, 15.0], "Bottle": [1.0, 2.0, 1.0]}
+    )
+    config = {
+        "profile_data": {"S1": profile, "S2": profile.copy(), "S3": None},
+        "bottle_type_dict": {"S1": {"DNA": [1]}, "S2": {"DNA": [2]}},
+        "output_paths": {"subplot": str(tmp_path)},
+        "plot_settings": {"dpi": 20},
+    }
+
+    generalized_profile_plot(
+        config, include_bottle_types=["DNA"], plot_all_together=False, max_workers=max_workers
+    )
+
+    assert sorted(os.listdir(tmp_path)) == ["profile_plot_S1.png", "profile_plot_S2.png"]
+
+
+def test_bathymetry_grid_is_float32():
+    """
+    Test that the bathymetry grid is downcast to float32, reshaped to (lat, lon) and shape-checked.
+    """
+    bathy = xr.Dataset(
+        {"elevation": (("lat", "lon"), np.arange(6, dtype=np.int16).reshape(2, 3))},
+        coords={"lon": [0.0, 1.0, 2.0], "lat": [10.0, 11.0]},
+    )
+    lon, lat, depths = _bathymetry_grid(bathy)
+
+    assert {lon.dtype, lat.dtype, depths.dtype} == {np.dtype(np.float32)}
+    assert depths.shape == (2, 3)
+
+    mismatched = {"lon": xr.DataArray([0.0, 1.0]), "lat": bathy["lat"], "elevation": bathy["elevation"]}
+    with pytest.raises(ValueError, match="does not match"):
+        _bathymetry_grid(mismatched)
+
+
+def test_bathymetry_arrays_are_used_as_is():
+    """
+    Test that precomputed BathymetryArrays skip the dataset extraction and still plot.
+    """
+    bathy = xr.Dataset(
+        {"elevation": (("lat", "lon"), np.arange(6.0).reshape(2, 3))},
+        coords={"lon": [0.0, 1.0, 2.0], "lat": [10.0, 11.0]},
+    )
+    arrays = BathymetryArrays.from_dataset(bathy)
+    assert _bathymetry_grid(arrays) is arrays
+    assert arrays.depths.dtype == np.float32
+
+    fig, ax = plt.subplots()
+    assert _draw_bathymetry(ax, arrays, "pcolormesh") is not None
+    plt.close(fig)
+
+
+def test_generalized_profile_plot_resolves_shared_station_once(tmp_path, monkeypatch):
+    """
+    Test that a station shared by several groups has its x values computed once per call.
+    """
+    calls = []
+    original = plotting._profile_x
+
+    def counting_profile_x(config, station_id, *args):
+        calls.append(station_id)
+        return original(config, station_id, *args)
+
+    monkeypatch.setattr(plotting, "_profile_x", counting_profile_x)
+
+    profile = pd.DataFrame({"CTD_depth": [5.0, 10.0], "Bottle": [1.0, 1.0]})
+    config = {
+        "profile_data": {"S1": profile, "S2": profile.copy()},
+        "bottle_type_dict": {"S1": {"DNA": [1]}, "S2": {"DNA": [1]}},
+        "cumulative_distances": {"S1": [0.0, 1.0], "S2": [0.0, 2.0]},
+        "output_paths": {"subplot": str(tmp_path)},
+        "plot_settings": {"dpi": 20},
+    }
+
+    plotting.generalized_profile_plot(
+        config,
+        axis_config="distance",
+        create_subplots=True,
+        grouping_list=[["S1", "S2"], ["S1"]],
+    )
+
+    assert sorted(calls) == ["S1", "S2"]
+    assert (tmp_path / "profile_plot_group.png").exists()
+
+
+def test_subsample_grid_to_pixel_budget():
+    """
+    Test that grids are decimated to at least one cell per pixel and small grids are kept.
+    """
+    lon = np.arange(100.0)
+    lat = np.arange(40.0)
+    depths = np.arange(4000.0).reshape(40, 100)
+
+    sub_lon, sub_lat, sub_depths = _subsample_grid(lon, lat, depths, (30, 40))
+    assert sub_lon.tolist() == lon[::3].tolist()
+    assert sub_lat.size == 40
+    assert sub_depths.shape == (40, 34)
+    assert sub_depths[1, 1] == depths[1, 3]
+
+    assert _subsample_grid(lon, lat, depths, (200, 200))[2] is depths
+
+
+def test_save_figure_fast_png(tmp_path, monkeypatch):
+    """
+    Test that HYDRA_FAST_PNG trades PNG size for speed and leaves other formats alone.
+    """
+    fig, ax = plt.subplots()
+    ax.imshow(np.random.default_rng(0).random((50, 50)))
+
+    monkeypatch.setenv("HYDRA_FAST_PNG", "0")
+    _save_figure(fig, tmp_path / "default.png", 50)
+    monkeypatch.setenv("HYDRA_FAST_PNG", "1")
+    _save_figure(fig, tmp_path / "fast.png", 50)
+    _save_figure(fig, tmp_path / "fast.svg", 50)
+
+    assert (tmp_path / "fast.png").stat().st_size >= (tmp_path / "default.png").stat().st_size
+    assert (tmp_path / "fast.svg").exists()
+    plt.close(fig)
@@ -1,6 +1,19 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
 import pytest
+from geopy.distance import geodesic, great_circle
 
-from hydra.utilities import (calculate_cumulative_distances,
+from hydra._kernels import haversine_segments_parallel
+from hydra.utilities import (EARTH_RADIUS_KM, NUMBA_HAVERSINE_MIN_POINTS,
+                             SMALL_TRACK_MAX_POINTS, CoordinatePath,
+                             _haversine_segments,
+                             assign_bottle_types_to_stations,
+                             calculate_cumulative_distances, load_json_file,
+                             pairwise_haversine, scan_files,
                              validate_coordinates)
 
 
@@ -24,34 +37,26 @@ def test_calculate_cumulative_distances_single_point():
     assert distances == [0], "Cumulative distance for a single point should be [0]."
 
 
-def test_calculate_cumulative_distances_two_points_haversine():
+@pytest.mark.parametrize(
+    "coords, method, expected",
+    [
+        # NYC to London, haversine on the mean Earth radius (6371.0088 km)
+        ([(40.7128, -74.0060), (51.5074, -0.1278)], "haversine", 5570.23),
+        # Los Angeles to Las Vegas, WGS84 geodesic (Karney; Vincenty agrees to the metre)
+        ([(34.0522, -118.2437), (36.1699, -115.1398)], "geodesic", 367.75),
+    ],
+)
+def test_calculate_cumulative_distances_two_points(coords, method, expected):
     """
-    Test calculating cumulative distances between two points using the Haversine method.
+    Test calculating cumulative distances between two points with each method.
     """
-    coords = [(40.7128, -74.0060), (51.5074, -0.1278)]  # NYC to London
-    distances = calculate_cumulative_distances(coords, method="haversine")
+    distances = calculate_cumulative_distances(coords, method=method)
     assert (
         len(distances) == 2
     ), "There should be two cumulative distances for two points."
     assert distances[0] == 0, "The first cumulative distance should be 0."
-    assert (
-        isinstance(distances[1], float) and distances[1] > 0
-    ), "The second distance should be a positive float."
-
-
-def test_calculate_cumulative_distances_two_points_geodesic():
-    """
-    Test calculating cumulative distances between two points using the Geodesic method.
-    """
-    coords = [(34.0522, -118.2437), (36.1699, -115.1398)]  # Los Angeles to Las Vegas
-    distances = calculate_cumulative_distances(coords, method="geodesic")
-    assert (
-        len(distances) == 2
-    ), "There should be two cumulative distances for two points."
-    assert distances[0] == 0, "The first cumulative distance should be 0."
-    assert (
-        isinstance(distances[1], float) and distances[1] > 0
-    ), "The second distance should be a positive float."
+    assert isinstance(distances[1], float), "The second distance should be a float."
+    np.testing.assert_allclose(distances[1], expected, rtol=1e-3)
 
 
 def test_calculate_cumulative_distances_multiple_points():
@@ -68,79 +73,205 @@ def test_calculate_cumulative_distances_multiple_points():
     assert (
         distances[2] > distances[1]
     ), "The third cumulative distance should be greater than the second."
+    # Both legs are 1 degree of arc: 6371.0088 km * pi / 180 = 111.195 km each
+    np.testing.assert_allclose(distances, [0.0, 111.195, 222.390], rtol=1e-3)
 
 
-def test_validate_coordinates_valid():
+def test_calculate_cumulative_distances_array_input():
     """
-    Test validating a set of valid geographic coordinates.
+    Test that an (N, 2) array gives the same result as a list of tuples.
     """
-    latitudes = [0, 45, -30]
-    longitudes = [0, 120, -150]
-    # Should not raise any exception
-    try:
-        validate_coordinates(latitudes, longitudes)
-    except (ValueError, TypeError):
-        pytest.fail("validate_coordinates() raised an unexpected exception!")
+    coords = [(0, 0), (0, 1), (1, 1)]
+    expected = calculate_cumulative_distances(coords, method="haversine")
+    distances = calculate_cumulative_distances(np.array(coords), method="haversine")
+    assert distances == expected, "Array and list inputs should give equal distances."
 
 
-def test_validate_coordinates_invalid_latitude():
+def test_calculate_cumulative_distances_long_haversine_track():
     """
-    Test validating coordinates with an invalid latitude.
+    Test that long tracks (compiled kernel when Numba is installed) match the NumPy haversine.
     """
-    latitudes = [0, 95, -30]  # 95 is invalid (valid range: -90 to 90)
-    longitudes = [0, 120, -150]
-    with pytest.raises(
-        ValueError, match="Latitude values must be between -90 and 90 degrees."
-    ):
-        validate_coordinates(latitudes, longitudes)
+    rng = np.random.default_rng(0)
+    coords = np.column_stack(
+        [rng.uniform(-60, 60, NUMBA_HAVERSINE_MIN_POINTS), rng.uniform(-180, 180, NUMBA_HAVERSINE_MIN_POINTS)]
+    )
+    expected = np.concatenate(([0.0], np.cumsum(_haversine_segments(coords))))
+    distances = calculate_cumulative_distances(coords, method="haversine")
+    assert distances == pytest.approx(expected.tolist(), rel=1e-9)
 
 
-def test_validate_coordinates_invalid_longitude():
+def test_calculate_cumulative_distances_short_haversine_track():
     """
-    Test validating coordinates with an invalid longitude.
+    Test that the scalar path for short tracks matches the NumPy haversine.
     """
-    latitudes = [0, 45, -30]
-    longitudes = [0, 200, -150]  # 200 is invalid (valid range: -180 to 180)
-    with pytest.raises(
-        ValueError, match="Longitude values must be between -180 and 180 degrees."
-    ):
-        validate_coordinates(latitudes, longitudes)
+    rng = np.random.default_rng(1)
+    coords = np.column_stack(
+        [rng.uniform(-60, 60, SMALL_TRACK_MAX_POINTS - 1), rng.uniform(-180, 180, SMALL_TRACK_MAX_POINTS - 1)]
+    )
+    expected = np.concatenate(([0.0], np.cumsum(_haversine_segments(coords))))
+    distances = calculate_cumulative_distances(coords.tolist(), method="haversine")
+    assert distances == pytest.approx(expected.tolist(), rel=1e-12)
 
 
-def test_validate_coordinates_mismatched_lengths():
+@pytest.mark.slow
+def test_calculate_cumulative_distances_haversine_scale():
     """
-    Test validating coordinates with mismatched lengths of latitude and longitude lists.
+    Test that a 100k point haversine track (parallel kernel when Numba is installed) matches NumPy.
     """
-    latitudes = [0, 45]
-    longitudes = [0, 120, -150]
-    with pytest.raises(
-        ValueError, match="Latitude and longitude lists must have the same length."
-    ):
-        validate_coordinates(latitudes, longitudes)
+    n = 100_000
+    rng = np.random.default_rng(0)
+    coords = list(zip(rng.uniform(-80, 80, n), rng.uniform(-180, 180, n)))
+
+    distances = calculate_cumulative_distances(coords, method="haversine")
+    expected = np.concatenate(([0.0], np.cumsum(_haversine_segments(np.array(coords)))))
+    assert len(distances) == n
+    np.testing.assert_allclose(distances, expected, rtol=1e-9)
 
 
-def test_validate_coordinates_invalid_type():
+def test_calculate_cumulative_distances_ruler_close_to_geodesic():
     """
-    Test that passing non-numeric types to validate_coordinates raises a TypeError.
+    Test that the Cheap Ruler method stays within 0.1% of geodesic distances on short hops.
     """
-    latitudes = [0, "invalid", -30]
-    longitudes = [0, 120, -150]
-    with pytest.raises(
-        TypeError, match="Latitude values must be numeric. Invalid value: invalid"
-    ):
-        validate_coordinates(latitudes, longitudes)
+    coords = [(34.0522, -118.2437), (34.5, -117.9), (35.2, -117.0), (36.1699, -115.1398),
+              (-20.0, 179.9), (-20.1, -179.8)]
+    expected = calculate_cumulative_distances(coords, method="geodesic")
+    distances = calculate_cumulative_distances(coords, method="ruler")
+    segments = np.diff(distances)
+    assert segments[:3] == pytest.approx(np.diff(expected)[:3], rel=1e-3)
+    assert segments[4] == pytest.approx(np.diff(expected)[4], rel=1e-3), "Should cross the antimeridian."
 
 
-def test_validate_coordinates_invalid_longitude_type():
+def test_haversine_segments_parallel_matches_numpy():
     """
-    Test that passing non-numeric types to validate_coordinates raises a TypeError for longitude.
+    Test that the threaded haversine kernel returns the NumPy segment distances.
     """
-    latitudes = [0, 45, -30]
-    longitudes = [0, "invalid", -150]
-    with pytest.raises(
-        TypeError, match="Longitude values must be numeric. Invalid value: invalid"
-    ):
+    coords = np.array([(0.0, 0.0), (0.0, 1.0), (1.0, 1.0), (45.0, -120.0)])
+    radians = np.radians(coords)
+    segments = haversine_segments_parallel(
+        np.ascontiguousarray(radians[:, 0]), np.ascontiguousarray(radians[:, 1]), EARTH_RADIUS_KM
+    )
+    assert segments == pytest.approx(_haversine_segments(coords), rel=1e-9)
+
+
+def test_import_hydra_does_not_load_kernels():
+    """
+    Test that importing hydra and measuring a short track leave the compiled kernels unloaded.
+    """
+    code = (
+        "import sys, hydra; "
+        "hydra.calculate_cumulative_distances([(0, 0), (0, 1)], method='haversine'); "
+        "assert 'hydra._kernels' not in sys.modules and 'numba' not in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+@pytest.mark.parametrize("use_pyproj", [True, False])
+def test_calculate_cumulative_distances_geodesic_matches_geopy(monkeypatch, use_pyproj):
+    """
+    Test that the geodesic method agrees with geopy, including coincident and antipodal points,
+    both through pyproj and through the Numba/geopy fallback.
+    """
+    if not use_pyproj:
+        monkeypatch.setattr("hydra.utilities._wgs84_geod", lambda: None)
+
+    coords = [(34.0522, -118.2437), (36.1699, -115.1398), (36.1699, -115.1398),
+              (0, 0), (0.5, 179.7)]
+    expected = [0.0]
+    for start, end in zip(coords[:-1], coords[1:]):
+        expected.append(expected[-1] + geodesic(start, end).kilometers)
+    distances = calculate_cumulative_distances(coords, method="geodesic")
+    assert distances == pytest.approx(expected, rel=1e-6), "Geodesic distances should match geopy."
+
+
+def test_calculate_cumulative_distances_great_circle_matches_geopy():
+    """
+    Test that the vectorized great-circle method agrees with geopy.
+    """
+    coords = [(34.0522, -118.2437), (36.1699, -115.1398), (36.1699, -115.1398), (0, 0), (0.5, 179.7)]
+    expected = [0.0]
+    for start, end in zip(coords[:-1], coords[1:]):
+        expected.append(expected[-1] + great_circle(start, end).kilometers)
+    distances = calculate_cumulative_distances(coords, method="great_circle")
+    assert distances == pytest.approx(expected, rel=1e-9), "Great-circle distances should match geopy."
+
+
+def test_pairwise_haversine():
+    """
+    Test that pairwise distances are symmetric and match the cumulative haversine segments.
+    """
+    coords = [(0, 0), (0, 1), (1, 1), (-0.5, 179.9)]
+    matrix = pairwise_haversine(coords)
+    assert matrix.shape == (4, 4)
+    assert np.allclose(matrix, matrix.T) and np.allclose(np.diag(matrix), 0.0)
+
+    cumulative = calculate_cumulative_distances(coords, method="haversine")
+    assert np.cumsum(np.diag(matrix, k=1)) == pytest.approx(cumulative[1:], rel=1e-9)
+    assert pairwise_haversine(coords[:2], coords).shape == (2, 4)
+
+
+def test_coordinate_path_incremental():
+    """
+    Test that a track grown point by point gives the same distances as the batch computation.
+    """
+    rng = np.random.default_rng(2)
+    coords = np.column_stack([rng.uniform(-60, 60, 200), rng.uniform(-180, 180, 200)])
+
+    path = CoordinatePath(capacity=1)
+    assert path.cumulative() == [0.0]
+    for i, (lat, lon) in enumerate(coords[:150]):
+        path.add_point(lat, lon)
+        if i % 37 == 0:
+            path.cumulative()
+    path.extend(coords[150:])
+
+    expected = calculate_cumulative_distances(coords, method="haversine")
+    assert len(path) == len(coords)
+    assert path.cumulative() == pytest.approx(expected, rel=1e-9)
+    assert CoordinatePath(coords).cumulative() == pytest.approx(expected, rel=1e-9)
+
+
+@pytest.mark.parametrize(
+    "latitudes, longitudes, exc, match",
+    [
+        pytest.param([0, 45, -30], [0, 120, -150], None, None, id="valid"),
+        pytest.param(
+            np.array([0.0, 45.0, -30.0]), np.array([0.0, 120.0, -150.0]), None, None,
+            id="valid_array",
+        ),
+        # 95 is invalid (valid range: -90 to 90)
+        pytest.param(
+            [0, 95, -30], [0, 120, -150], ValueError,
+            "Latitude values must be between -90 and 90 degrees.", id="bad_lat",
+        ),
+        # 200 is invalid (valid range: -180 to 180)
+        pytest.param(
+            [0, 45, -30], [0, 200, -150], ValueError,
+            "Longitude values must be between -180 and 180 degrees.", id="bad_lon",
+        ),
+        pytest.param(
+            [0, 45], [0, 120, -150], ValueError,
+            "Latitude and longitude lists must have the same length.", id="mismatched",
+        ),
+        pytest.param(
+            [0, "invalid", -30], [0, 120, -150], TypeError,
+            "Latitude values must be numeric. Invalid value: invalid", id="lat_type",
+        ),
+        pytest.param(
+            [0, 45, -30], [0, "invalid", -150], TypeError,
+            "Longitude values must be numeric. Invalid value: invalid", id="lon_type",
+        ),
+    ],
+)
+def test_validate_coordinates(latitudes, longitudes, exc, match):
+    """
+    Test validating geographic coordinates, valid and invalid.
+    """
+    if exc is None:
+        # Should not raise any exception
         validate_coordinates(latitudes, longitudes)
+    else:
+        with pytest.raises(exc, match=match):
+            validate_coordinates(latitudes, longitudes)
 
 
 def test_calculate_cumulative_distances_invalid_method():
@@ -150,6 +281,65 @@ def test_calculate_cumulative_distances_invalid_method():
     coords = [(0, 0), (1, 1)]
     with pytest.raises(
         ValueError,
-        match="Invalid method. Choose 'geodesic', 'great_circle', or 'haversine'.",
+        match="Invalid method. Choose 'geodesic', 'great_circle', 'haversine', or 'ruler'.",
     ):
         calculate_cumulative_distances(coords, method="invalid_method")
+
+
+def test_scan_files_filters_by_extension(tmp_path):
+    """
+    Test that scan_files returns only regular files with the given extension, sorted by name.
+    """
+    (tmp_path / "b.csv").write_text("")
+    (tmp_path / "a.csv").write_text("")
+    (tmp_path / "notes.txt").write_text("")
+    (tmp_path / "folder.csv").mkdir()
+
+    names = [entry.name for entry in scan_files(str(tmp_path), ".csv")]
+    assert names == ["a.csv", "b.csv"], "Only CSV files should be listed, in name order."
+
+
+def test_load_json_file_reloads_after_change(tmp_path):
+    """
+    Test that load_json_file returns independent copies and re-reads a modified file.
+    """
+    path = tmp_path / "bottle_types.json"
+    path.write_text('{"Station1": {"DNA": [1, 2]}}')
+
+    first = load_json_file(str(path))
+    first["Station1"]["DNA"].append(3)
+    assert load_json_file(str(path)) == {"Station1": {"DNA": [1, 2]}}
+
+    path.write_text('{"Station2": {"DNA": [4]}}')
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert load_json_file(str(path)) == {"Station2": {"DNA": [4]}}
+
+
+def test_assign_bottle_types_to_stations():
+    """
+    Test that bottle types are mapped from bottle numbers, with later types winning for shared bottles.
+    """
+    bottle_data = {
+        "Station1": pd.DataFrame({"Bottle": [1.0, 2.0, 3.0, np.nan]}),
+        "Station2": pd.DataFrame({"Bottle": [1.0]}),
+    }
+    bottle_type_dict = {"Station1": {"DNA": [1, 2], "H2": [2], "CH4": None}}
+
+    result = assign_bottle_types_to_stations(bottle_data, bottle_type_dict)
+
+    types = result["Station1"]["Bottle_Type"]
+    assert isinstance(types.dtype, pd.CategoricalDtype)
+    assert types[:2].tolist() == ["DNA", "H2"]
+    assert types[2:].isna().all(), "Unlisted and missing bottles should have no type."
+    assert "Bottle_Type" not in result["Station2"], "Stations without types should be left unchanged."
+
+
+def test_assign_bottle_types_to_stations_non_integer_bottles():
+    """
+    Test that bottle labels outside the lookup-table range fall back to a hashed mapping.
+    """
+    bottle_data = {"Station1": pd.DataFrame({"Bottle": ["A", "B", "C"]})}
+    result = assign_bottle_types_to_stations(bottle_data, {"Station1": {"DNA": ["A", "C"]}})
+    assert result["Station1"]["Bottle_Type"].tolist()[::2] == ["DNA", "DNA"]
+    assert result["Station1"]["Bottle_Type"].isna().tolist() == [False, True, False]